@@ -19,10 +19,13 @@ def main():
     p.add_argument(
         "-d", "--dz", help="new z altitude grid spacing to interpolate to  (for tanh, (dzmin,dzmax))", type=float, nargs="+"
     )
-    p.add_argument("-m", "--newaltmethod", help="method of generating new altitude cell locations [linear, incr]", default="linear")
+    p.add_argument(
+        "-m", "--newaltmethod", help="method of generating new altitude cell locations [linear, incr, tanh]", default="linear"
+    )
+    p.add_argument("-n", "--ncells", help="number of altitude cells, solving for the last spacing of the method", type=int)
     p = p.parse_args()
 
-    msis = tr.readmsis(p.infn, p.outfn, p.dz, p.newaltmethod)
+    msis = tr.readmsis(p.infn, p.outfn, p.dz, p.newaltmethod, p.ncells)
 
     hd = msis.attrs["hd"]
 
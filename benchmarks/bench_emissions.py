@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+benchmark parsing of dir.output/emissions.dat:
+str.split + astype (previous readexcrates) vs. transcarread.reademissions
+
+synthetic files are made by repeating the time step of the test data, see synthetic.py
+
+    python benchmarks/bench_emissions.py 10 100 1000
+"""
+from pathlib import Path
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import tracemalloc
+import numpy as np
+
+import transcarread as tr
+
+import synthetic
+
+
+def write_emissions(beamdir: Path, size_mb: float) -> int:
+    """write emissions.dat of about size_mb megabytes, returns number of time steps"""
+    step = synthetic.write_emissions(beamdir, 1).stat().st_size
+    n_t = max(int(size_mb * 1e6 // step), 1)
+    synthetic.write_emissions(beamdir, n_t)
+
+    return n_t
+
+
+def split_parse(fn: Path) -> np.ndarray:
+    with fn.open("r") as f:
+        return np.asarray(f.read().split()).astype(float)
+
+
+def measure(func, *args) -> tuple:
+    tracemalloc.start()
+    tic = perf_counter()
+    func(*args)
+    elapsed = perf_counter() - tic
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main():
+    p = ArgumentParser(description="benchmark emissions.dat parsing")
+    p.add_argument("size_mb", help="synthetic file size(s) [MB]", type=float, nargs="+")
+    p.add_argument("--skip-split", help="don't run the str.split parser (slow for large files)", action="store_true")
+    p = p.parse_args()
+
+    with TemporaryDirectory() as d:
+        fn = Path(d) / tr.KINFN
+        for size_mb in p.size_mb:
+            n_t = write_emissions(Path(d), size_mb)
+            kinfn, nalt, nen, dip, ctime, ndatrow, ndat, Nprecip = tr.initparams(fn)
+            size_record = ndat + Nprecip + tr.NumPerRow
+            print(f"\n{fn.stat().st_size / 1e6:.0f} MB  {n_t} time steps")
+
+            t, peak = measure(tr.reademissions, fn, size_record, ndatrow + 1)
+            print(f"reademissions: {t:.3f} sec  peak memory {peak / 1e6:.0f} MB")
+
+            if not p.skip_split:
+                t, peak = measure(split_parse, fn)
+                print(f"split:         {t:.3f} sec  peak memory {peak / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
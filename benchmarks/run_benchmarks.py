@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+benchmark transcarread readers on synthetic files of increasing size.
+Wall time, peak RSS and peak traced allocation are measured for each reader in a fresh process,
+and saved as JSON so results can be compared between commits.
+
+    python benchmarks/run_benchmarks.py -n 1000 10000 100000 -z 50 300 -o bench.json
+
+    python benchmarks/run_benchmarks.py -o new.json --compare old.json
+"""
+from pathlib import Path
+from argparse import ArgumentParser, SUPPRESS
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tracemalloc
+import numpy as np
+import xarray
+
+import transcarread as tr
+import synthetic
+
+READERS = {
+    "read_tra": lambda d: tr.read_tra(d),
+    "read_tra_memmap": lambda d: tr.read_tra(d, memmap=True),
+    "read_tra_treq": lambda d: tr.read_tra(d, "2013-03-31T09:00:00"),
+    "readexcrates": lambda d: tr.readexcrates(d / tr.KINFN),
+    "readmsis": lambda d: tr.readmsis(d / "dir.input/90kmmaxpt123.dat"),
+    "readTranscarInput": lambda d: tr.readTranscarInput(d / "dir.input/DATCAR"),
+}
+# readers whose cost depends on number of time steps
+TIMESERIES = {"read_tra", "read_tra_memmap", "read_tra_treq", "readexcrates"}
+
+
+def child(reader: str, beamdir: Path):
+    """run in fresh process: measure one reader, print JSON result"""
+    func = READERS[reader]
+
+    tic = perf_counter()
+    func(beamdir)
+    wall = perf_counter() - tic
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":  # kilobytes
+        rss *= 1024
+
+    tracemalloc.start()
+    func(beamdir)
+    alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(json.dumps({"wall_s": wall, "peak_rss_bytes": rss, "alloc_peak_bytes": alloc}))
+
+
+def measure(reader: str, beamdir: Path) -> dict:
+    ret = subprocess.run(
+        [sys.executable, __file__, "--child", reader, str(beamdir)], stdout=subprocess.PIPE, universal_newlines=True, check=True
+    )
+
+    return json.loads(ret.stdout.splitlines()[-1])
+
+
+def makefiles(beamdir: Path, n_t: int, nalt: int) -> int:
+    """write all synthetic files, return total bytes"""
+    fns = [
+        synthetic.write_tra(beamdir, n_t, nalt),
+        synthetic.write_emissions(beamdir, n_t, nalt),
+        synthetic.write_msis(beamdir, nalt),
+        synthetic.write_datcar(beamdir),
+    ]
+
+    return sum(f.stat().st_size for f in fns)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent, universal_newlines=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(new: dict, old: dict):
+    """print ratio new/old of each measurement present in both"""
+    key = ("reader", "n_t", "nalt")
+    oldres = {tuple(r[k] for k in key): r for r in old["results"]}
+    print(f"\nnew {new['commit'][:8]} / old {old['commit'][:8]}")
+    for r in new["results"]:
+        o = oldres.get(tuple(r[k] for k in key))
+        if o is None:
+            continue
+        print(
+            f"{r['reader']:>18} n_t={r['n_t']:<7} nalt={r['nalt']:<4}"
+            f" time {r['wall_s'] / o['wall_s']:5.2f}x  alloc {r['alloc_peak_bytes'] / max(o['alloc_peak_bytes'], 1):5.2f}x"
+        )
+
+
+def main():
+    p = ArgumentParser(description="benchmark transcarread readers")
+    p.add_argument("-n", "--n_t", help="number(s) of time steps", type=int, nargs="+", default=[1000])
+    p.add_argument("-z", "--nalt", help="number(s) of altitudes", type=int, nargs="+", default=[50, 300])
+    p.add_argument("-r", "--readers", help="readers to benchmark", nargs="+", choices=list(READERS), default=list(READERS))
+    p.add_argument("-o", "--out", help="JSON file to write results to")
+    p.add_argument("--compare", help="JSON results of previous run to compare with")
+    p.add_argument("--child", help=SUPPRESS, nargs=2)
+    p = p.parse_args()
+
+    if p.child:
+        child(p.child[0], Path(p.child[1]))
+        return
+
+    res = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "xarray": xarray.__version__,
+        "results": [],
+    }
+
+    with TemporaryDirectory() as d:
+        beamdir = Path(d) / "beam52.7"
+        for nalt in p.nalt:
+            done = set()  # readers independent of n_t run once per nalt
+            for n_t in p.n_t:
+                nbytes = makefiles(beamdir, n_t, nalt)
+                for reader in p.readers:
+                    if reader not in TIMESERIES:
+                        if reader in done:
+                            continue
+                        done.add(reader)
+                    r = {"reader": reader, "n_t": n_t, "nalt": nalt, "file_bytes": nbytes}
+                    r.update(measure(reader, beamdir))
+                    res["results"].append(r)
+                    print(
+                        f"{reader:>18} n_t={n_t:<7} nalt={nalt:<4} {r['wall_s']:8.3f} s"
+                        f"  RSS {r['peak_rss_bytes'] / 1e6:8.1f} MB  alloc {r['alloc_peak_bytes'] / 1e6:8.1f} MB"
+                    )
+
+    if p.out:
+        Path(p.out).expanduser().write_text(json.dumps(res, indent=2))
+
+    if p.compare:
+        compare(res, json.loads(Path(p.compare).expanduser().read_text()))
+
+
+if __name__ == "__main__":
+    main()
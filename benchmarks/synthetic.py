@@ -0,0 +1,151 @@
+"""
+write synthetic Transcar files in the real formats at arbitrary size,
+derived from the test data interpolated to nalt altitudes.
+
+transcar_output: binary, records of 126 float32 header + nalt x 63 float32
+emissions.dat: ASCII, header line, then data and precip blocks of 5 values per line per time step
+90kmmaxpt123.dat: binary MSIS initial conditions, header + nalt x 63 float32
+DATCAR: Transcar input, copied
+"""
+from pathlib import Path
+import shutil
+import numpy as np
+
+import transcarread as tr
+from transcarread.interp import AltInterp
+
+R = Path(__file__).resolve().parents[1]
+BEAMDIR = R / "tests/data/beam52.7"
+
+
+def _altgrid(z: np.ndarray, nalt: int) -> np.ndarray:
+    """nalt altitudes spanning z, denser at bottom like Transcar grids"""
+    return z[0] + (z[-1] - z[0]) * np.linspace(0, 1, nalt) ** 1.5
+
+
+def _regrid(data: np.ndarray, nalt: int) -> np.ndarray:
+    """(nx, ncol) data with altitude in column 0 to nalt altitudes"""
+    z = _altgrid(data[:, 0], nalt)
+    out = AltInterp(data[:, 0], z)(data)
+    out[:, 0] = z
+
+    return out.astype(np.float32)
+
+
+def _datetimes(n_t: int, t0: str = "2013-03-31T09:00:00") -> np.ndarray:
+    return np.datetime64(t0) + np.arange(n_t).astype("timedelta64[s]")
+
+
+def _scale(n_t: int) -> np.ndarray:
+    """per time step factor, so that time steps differ"""
+    return 1 + np.arange(n_t) / 10
+
+
+def write_tra(beamdir: Path, n_t: int, nalt: int = None, chunk: int = 1000, scale: bool = False) -> Path:
+    """
+    write dir.output/transcar_output with n_t time steps 1 second apart
+
+    nalt: number of altitudes, default the test data grid
+    scale: data of time step i scaled by 1 + i / 10, else every time step is the same
+    """
+    raw = np.fromfile(BEAMDIR / "dir.output/transcar_output", np.float32)
+    nx, ncol = int(raw[0]), int(raw[1])
+    head = raw[: 2 * ncol].copy()
+    data = raw[2 * ncol: 2 * ncol + nx * ncol].reshape((nx, ncol))
+    if nalt is not None:
+        data = _regrid(data, nalt)
+    head[0] = data.shape[0]
+
+    fn = Path(beamdir).expanduser() / "dir.output/transcar_output"
+    fn.parent.mkdir(parents=True, exist_ok=True)
+
+    t = _datetimes(n_t)
+    with fn.open("wb") as f:
+        for i in range(0, n_t, chunk):
+            tc = t[i: i + chunk]
+            recs = np.empty((tc.size, head.size + data.size), np.float32)
+            recs[:, : head.size] = head
+            recs[:, 2] = tc.astype("datetime64[Y]").astype(int) + 1970
+            recs[:, 3] = tc.astype("datetime64[M]").astype(int) % 12 + 1
+            recs[:, 4] = (tc.astype("datetime64[D]") - tc.astype("datetime64[M]")).astype(int) + 1
+            sod = (tc - tc.astype("datetime64[D]")).astype(int)
+            recs[:, 5], recs[:, 6], recs[:, 7] = sod // 3600, sod // 60 % 60, sod % 60
+            d = recs[:, head.size:].reshape((tc.size, *data.shape))
+            d[:] = data
+            if scale:
+                d[..., 1:] *= _scale(n_t)[i: i + chunk, None, None].astype(np.float32)
+            recs.tofile(f)
+
+    return fn
+
+
+def write_emissions(beamdir: Path, n_t: int, nalt: int = None, nen: int = None, scale: bool = False) -> Path:
+    """
+    write dir.output/emissions.dat with n_t time steps 1 second apart, from the time of the test data
+
+    nalt, nen: number of altitudes and energies, default those of the test data
+    scale: excitation rates of time step i scaled by 1 + i / 10, else every time step is the same
+    """
+    kinfn, nalt0, nen0, dip, ctime, ndatrow, ndat, Nprecip = tr.initparams(BEAMDIR / tr.KINFN)
+    ref = tr.readexcrates(BEAMDIR / tr.KINFN)
+
+    exc = ref["excitation"][0]
+    data = np.column_stack((exc.alt_km, exc.values))
+    if nalt is not None:
+        data = _regrid(data, nalt)
+    precip = ref["precip"][0].values
+    if nen is not None:
+        precip = np.resize(precip, (nen, tr.NprecipCol))
+    nalt, nen = data.shape[0], precip.shape[0]
+
+    fn = Path(beamdir).expanduser() / tr.KINFN
+    fn.parent.mkdir(parents=True, exist_ok=True)
+
+    t = _datetimes(n_t, ref.time.values[0])
+    yd = t.astype("datetime64[Y]").astype(int) + 1970
+    doy = (t.astype("datetime64[D]") - t.astype("datetime64[Y]")).astype(int) + 1
+    sod = (t - t.astype("datetime64[D]")).astype("timedelta64[s]").astype(int)
+    # each line holds NumPerRow values, and precip starts on a new line after data, as Fortran writes them
+    body = _lines(data) + _lines(precip)
+    with fn.open("w") as f:
+        for i, (y, d, s) in enumerate(zip(yd, doy, sod)):
+            f.write(f"     {y}{d:03d}   {s:.10f}        {90 - dip:.5f}             {nalt}         {nen}\n")
+            if scale:
+                body = _lines(np.column_stack((data[:, 0], data[:, 1:] * _scale(n_t)[i]))) + _lines(precip)
+            f.write(body)
+
+    return fn
+
+
+def _lines(vals: np.ndarray) -> str:
+    """values NumPerRow per line, the last line possibly shorter"""
+    vals = vals.ravel()
+    lines = [" ".join(f"{v:14.7E}" for v in vals[i: i + tr.NumPerRow]) for i in range(0, vals.size, tr.NumPerRow)]
+    return "\n".join(" " + line for line in lines) + "\n"
+
+
+def write_msis(beamdir: Path, nalt: int) -> Path:
+    """write dir.input/90kmmaxpt123.dat initial conditions with nalt altitudes"""
+    ifn = BEAMDIR / "dir.input/90kmmaxpt123.dat"
+    raw = np.fromfile(ifn, np.float32)
+    nx, ncol = int(raw[0]), int(raw[1])
+    head = raw[: 2 * ncol].copy()
+    head[0] = nalt
+    data = _regrid(raw[2 * ncol: 2 * ncol + nx * ncol].reshape((nx, ncol)), nalt)
+
+    fn = Path(beamdir).expanduser() / "dir.input/90kmmaxpt123.dat"
+    fn.parent.mkdir(parents=True, exist_ok=True)
+    with fn.open("wb") as f:
+        head.tofile(f)
+        data.tofile(f)
+
+    return fn
+
+
+def write_datcar(beamdir: Path) -> Path:
+    """copy Transcar input file DATCAR"""
+    fn = Path(beamdir).expanduser() / "dir.input/DATCAR"
+    fn.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(BEAMDIR / "dir.input/DATCAR", fn)
+
+    return fn
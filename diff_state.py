@@ -1,47 +1,52 @@
 #!/usr/bin/env python
 """
-Reads output of Transcar sim, yielding Incoherent Scatter Radar plasma parameters.
+Compares output of Transcar sims, e.g. a new model build against a reference run.
+Runs are streamed record by record, so long runs needn't fit in memory.
 
-    python transcar2isr.py tests/data/beam52
+    python diff_state.py ref/beam52 new/beam52 other/beam52
 
+With --tReq, the ISR parameter difference of the first two runs at that time is also plotted.
 """
 from pathlib import Path
-from matplotlib.pyplot import show
 from argparse import ArgumentParser
-from datetime import datetime
 
 #
-import transcarread.plots as plots
 import transcarread as tr
-
-
-def compute(path: Path, tReq: datetime, plot_params: list):
-    path = Path(path).expanduser().resolve()
-    # %% get sim parameters
-    datfn = path / "dir.input/DATCAR"
-    tctime = tr.readTranscarInput(datfn)
-    # %% load transcar output
-    iono = tr.read_tra(path, tReq)
-
-    return iono, tctime
+import transcarread.compare as trc
 
 
 def main():
-    p = ArgumentParser(description="reads dir.output/transcar_output")
+    p = ArgumentParser(description="compares dir.output/transcar_output of runs with a reference run")
     p.add_argument("ref", help="old reference path above dir.output/")
-    p.add_argument("new", help="path above new dir.output/")
-    p.add_argument("--tReq", help="time to extract data at")
+    p.add_argument("new", help="path(s) above new dir.output/", nargs="+")
+    p.add_argument("--tReq", help="time to plot difference at")
     p.add_argument("-p", "--params", help="only plot these params", choices=["ne", "vi", "Ti", "Te"], nargs="+")
+    p.add_argument("--atol", help="absolute tolerance for divergence", type=float, default=0.0)
+    p.add_argument("--rtol", help="relative tolerance for divergence", type=float, default=0.0)
     p = p.parse_args()
 
-    dat1, t1 = compute(p.ref, p.tReq, p.params)
-    dat2, t2 = compute(p.new, p.tReq, p.params)
+    stats = trc.compare([p.ref] + p.new, atol=p.atol, rtol=p.rtol)
+
+    print("reference", stats.attrs["reference"], f"{stats.attrs['n_t']} time steps")
+    for run in stats.run.values:
+        s = stats.sel(run=run)
+        print(f"\n{run}  max time offset {s.time_offset.values.astype('timedelta64[s]')}")
+        for par in s.param.values:
+            d = s.sel(param=par)
+            first = "" if d.first_time.isnull() else f"diverges {d.first_time.values} at {d.first_alt_km.item():.1f} km"
+            print(f"{par:>5} max abs {d.max_abs.item():10.4g}  rms {d.rms.item():10.4g}  {first}")
+
+    if p.tReq:
+        from matplotlib.pyplot import show
+        import transcarread.plots as plots
 
-    diff = dat1-dat2
-    # %% do plot
-    plots.plot_isr(diff, p.new, t2, p.params)
+        ref = Path(p.ref).expanduser()
+        new = Path(p.new[0]).expanduser()
+        dnew = tr.read_tra(new, p.tReq)
+        diff = (tr.read_tra(ref, p.tReq) - dnew).assign_coords(time=dnew.time)
+        plots.plot_isr(diff, new, tr.readTranscarInput(new / "dir.input/DATCAR"), p.params)
 
-    show()
+        show()
 
 
 if __name__ == "__main__":
@@ -4,6 +4,9 @@ Reads output of Transcar sim, yielding Incoherent Scatter Radar plasma parameter
 
     python transcar2isr.py tests/data/beam52
 
+quick-look image files of long runs, rendered in parallel without a display:
+
+    python plasma_state.py tests/data/beam52 -o ql/
 """
 from pathlib import Path
 from matplotlib.pyplot import show
@@ -15,7 +18,9 @@ import transcarread.plots as plots
 import transcarread as tr
 
 
-def compute(path: Path, tReq: datetime, plot_params: list, verbose: bool):
+def compute(
+    path: Path, tReq: datetime, plot_params: list, verbose: bool, outdir: Path = None, width: int = None, workers: int = None
+):
     path = Path(path).expanduser().resolve()
     # %% get sim parameters
     datfn = path / "dir.input/DATCAR"
@@ -23,7 +28,11 @@ def compute(path: Path, tReq: datetime, plot_params: list, verbose: bool):
     # %% load transcar output
     iono = tr.read_tra(path, tReq)
     # %% do plot
-    plots.plot_isr(iono, path, tctime, plot_params, verbose)
+    if outdir:
+        for fn in plots.render_isr(iono, outdir, tctime, plot_params, verbose, width or 1000, workers):
+            print("wrote", fn)
+    else:
+        plots.plot_isr(iono, path, tctime, plot_params, verbose, width)
 
     return iono, tctime
 
@@ -34,11 +43,15 @@ def main():
     p.add_argument("--tReq", help="time to extract data at")
     p.add_argument("-v", "--verbose", help="more plots", action="store_true")
     p.add_argument("-p", "--params", help="only plot these params", choices=["ne", "vi", "Ti", "Te"], nargs="+")
+    p.add_argument("-o", "--outdir", help="write plots to image files in this directory instead of displaying")
+    p.add_argument("-w", "--width", help="decimate time to this many pixel columns", type=int)
+    p.add_argument("-j", "--workers", help="number of rendering processes with --outdir", type=int)
     p = p.parse_args()
 
-    compute(p.path, p.tReq, p.params, p.verbose)
+    compute(p.path, p.tReq, p.params, p.verbose, p.outdir, p.width, p.workers)
 
-    show()
+    if not p.outdir:
+        show()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+from pathlib import Path
+from typing import Tuple
+import numpy as np
+import pytest
+import sys
+
+tdir = Path(__file__).parent
+sys.path.insert(0, str(tdir.parent / "benchmarks"))
+
+import synthetic  # noqa: E402
+
+
+def write_tra(path: Path, n_t: int) -> Path:
+    """
+    write a transcar_output of n_t records, made from the single record in the test data
+    with time stepped by 1 second and data scaled per record so records differ
+    """
+    synthetic.write_tra(path, n_t, scale=True)
+
+    return path
+
+
+def write_emissions(path: Path, n_t: int) -> Path:
+    """
+    write an emissions.dat of n_t time steps, made from the single time step in the test data
+    with time stepped by 1 second
+    """
+    return synthetic.write_emissions(path, n_t)
+
+
+def write_emissions_grid(path: Path, nalt: int, nen: int, n_t: int) -> Tuple[Path, np.ndarray, np.ndarray]:
+    """
+    write an emissions.dat of n_t time steps on nalt altitudes and nen energies, differing per time step,
+    laid out as Fortran writes it: data and precip each start on a new line of 5 values.
+    Returns filename, excitation (n_t, nalt, 11) and precip (n_t, nen, 2) as written.
+    """
+    fn = synthetic.write_emissions(path, n_t, nalt, nen, scale=True)
+
+    with fn.open("r") as f:
+        v = np.asarray(f.read().split()).astype(float).reshape((n_t, -1))
+    exc = v[:, 5: 5 + nalt * 11].reshape((n_t, nalt, 11))
+    precip = v[:, 5 + nalt * 11:].reshape((n_t, nen, 2))
+
+    return fn, exc, precip
+
+
+@pytest.fixture
+def multiemis(tmp_path) -> Path:
+    return write_emissions(tmp_path / "beam52.7", 4)
+
+
+@pytest.fixture
+def multitra(tmp_path) -> Path:
+    return write_tra(tmp_path / "beam52.7", 5)
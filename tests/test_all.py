@@ -2,11 +2,14 @@
 from pathlib import Path
 import numpy as np
 import pytest
+import xarray
 from datetime import datetime
 from pytest import approx
 
 import transcarread as tr
 
+from conftest import write_emissions_grid
+
 #
 tdir = Path(__file__).parent
 infn = tdir / "data/beam52.7/dir.input/90kmmaxpt123.dat"
@@ -27,6 +30,110 @@ def test_readtra():
     assert iono["pp"].loc[..., "Ti"][53] == approx(1285.927001953125)
 
 
+def test_readtra_memmap():
+    tReq = "2013-03-31T09:00:21"
+    iono = tr.read_tra(tdir / "data/beam52.7", tReq, memmap=True)
+
+    assert iono["iono"].loc[..., "n1"][30] == approx(2.0969721e11)
+    assert iono.attrs["chi"] == approx(110.40122986)
+    assert iono["pp"].loc[..., "Ti"][53] == approx(1285.927001953125)
+
+
+def test_readtra_memmap_multi(multitra):
+    ref = tr.read_tra(multitra)
+    iono = tr.read_tra(multitra, memmap=True)
+
+    assert iono.time.size == 5
+    assert (iono.time.values == ref.time.values).all()
+    assert np.allclose(iono["iono"].values, ref["iono"].values, equal_nan=True)
+    assert np.allclose(iono["pp"].values, ref["pp"].values, equal_nan=True)
+
+
+def test_readtra_timewindow(multitra):
+    ref = tr.read_tra(multitra)
+
+    iono = tr.read_tra(multitra, "2013-03-31T09:00:03")
+    assert iono.time.values == np.datetime64("2013-03-31T09:00:03")
+    assert np.allclose(iono["iono"], ref["iono"][3], equal_nan=True)
+
+    iono = tr.read_tra(multitra, ["2013-03-31T09:00:04", datetime(2013, 3, 31, 9, 0, 1)])
+    assert (iono.time.values == ref.time.values[[4, 1]]).all()
+    assert np.allclose(iono["pp"], ref["pp"][[4, 1]], equal_nan=True)
+
+    iono = tr.read_tra(multitra, ("2013-03-31T09:00:01", "2013-03-31T09:00:03"))
+    assert (iono.time.values == ref.time.values[1:4]).all()
+    assert np.allclose(iono["iono"], ref["iono"][1:4], equal_nan=True)
+
+    assert tr.read_tra(multitra, (None, "2013-03-31T09:00:01")).time.size == 2
+
+    with pytest.raises(ValueError):
+        tr.read_tra(multitra, ("2013-03-31T10:00:00", None))
+
+
+def test_readtra_single_record_list():
+    tcofn = tdir / "data/beam52.7"
+    ref = tr.read_tra(tcofn)
+
+    assert (tr.timeindex(ref.time.values, ["2013-03-31T09:00:00", "2013-03-31T10:00:00"]) == 0).all()
+
+    iono = tr.read_tra(tcofn, ["2013-03-31T09:00:21", "2013-03-31T10:00:00"])
+    assert iono.time.size == 2
+    assert (iono.time.values == ref.time.values[0]).all()
+    assert np.allclose(iono["iono"][1], ref["iono"][0], equal_nan=True)
+
+
+def test_parseionoheaders(multitra):
+    raw = np.fromfile(multitra / "dir.output/transcar_output", np.float32).reshape((5, -1))
+    h = raw[:, :tr.nhead].copy()
+    h[[1, 3], 3] = 13  # month
+
+    hd, bad = tr.parseionoheaders(h)
+    ref = tr.parseionoheader(h[0])
+
+    assert bad.tolist() == [1, 3]
+    assert np.isnat(hd["htime"][bad]).all()
+    assert hd["htime"][0] == np.datetime64(ref["htime"])
+    assert hd["htime"][4] == np.datetime64("2013-03-31T09:00:04")
+    for k in ("nx", "ncol", "chi", "approx", "latgeo"):
+        assert (hd[k] == ref[k]).all()
+
+
+def test_iter_tra(multitra):
+    ref = tr.read_tra(multitra)
+
+    chunks = tr.iter_tra(multitra, chunk=2)
+    assert chunks.remaining == 5
+    assert len(chunks) == 3
+
+    sizes = []
+    for ds in chunks:
+        sizes.append(ds.time.size)
+        assert np.allclose(ds["pp"], ref["pp"].sel(time=ds.time), equal_nan=True)
+        assert (ds.alt_km == ref.alt_km).all()
+    assert sizes == [2, 2, 1]
+    assert chunks.remaining == 0
+
+
+def test_plasmaparam(multitra):
+    iono = tr.read_tra(multitra, memmap=True)["iono"].dropna("isrparam")
+    nm = iono.loc[..., ["n4", "n5", "n6"]].sum("isrparam")
+
+    pp = tr.compplasmaparam(iono, 13)
+    ne = tr.comp_ne(iono)
+
+    assert pp.dims == ("time", "alt_km", "isrparam")
+    assert np.allclose(pp.loc[..., "ne"], ne)
+    assert np.allclose(pp.loc[..., "vi"], tr.comp_vi(iono, nm, pp), rtol=1e-5)
+    assert np.allclose(pp.loc[..., "Ti"], tr.comp_Ti(iono, nm, pp), rtol=1e-5)
+    assert np.allclose(pp.loc[..., "Te"], tr.comp_Te(iono, 13))
+
+    out = np.empty(iono.shape[:-1] + (4,), np.float32)
+    pp32 = tr.compplasmaparam(iono, 13, out=out)
+    assert pp32.dtype == np.float32
+    assert np.shares_memory(pp32.values, out)
+    assert np.allclose(pp32, pp, rtol=1e-5)
+
+
 def test_readtranscar():
     e0 = 52.7
     tReq = datetime(2013, 3, 31, 9, 0, 21)
@@ -36,10 +143,114 @@ def test_readtranscar():
     assert rates.time.values == np.datetime64("2013-03-31T09:00:42")
 
 
+def test_reademissions(multiemis):
+    with multiemis.open("r") as f:
+        ref = np.asarray(f.read().split()).astype(float)
+
+    size_record = ref.size // 4
+    lines = multiemis.read_text().count("\n") // 4
+
+    assert (tr.reademissions(multiemis, size_record, lines) == ref).all()
+    # block boundaries falling mid-line
+    assert (tr.reademissions(multiemis, size_record, lines, blocksize=1000) == ref).all()
+
+    out = np.empty(ref.size + 10)
+    assert np.shares_memory(tr.reademissions(multiemis, size_record, lines, out=out), out)
+
+    rates = tr.readexcrates(multiemis)
+    assert rates.time.size == 4
+    assert (rates.time.values == np.datetime64("2013-03-31T09:00:42") + np.arange(4).astype("timedelta64[s]")).all()
+    assert rates["precip"].shape == (4, 170, 2)
+    assert rates["excitation"].loc[:, :, "no1d"][2, 53] == approx(15638.62)
+
+
+@pytest.mark.parametrize("nalt, nen, n_t", [(125, 170, 3), (121, 173, 400), (123, 170, 2)])
+def test_readexcrates_layout(tmp_path, nalt, nen, n_t):
+    """grids where lines per time step differ from a single stream of data and precip values"""
+    fn, exc, precip = write_emissions_grid(tmp_path, nalt, nen, n_t)
+
+    nline = tr.initparams(fn)[5] + 1
+    assert fn.read_text().count("\n") == n_t * nline
+
+    rates = tr.readexcrates(fn)
+    assert rates.time.size == n_t
+    assert (rates["excitation"].values == exc[..., 1:]).all()
+    assert (rates["precip"].values == precip).all()
+
+
 def test_readmsis():
     msis = tr.readmsis(infn)
     assert msis["msis"].loc[..., "no1d"][53] == approx(116101103616.0)
 
 
+def initcond():
+    """msis of the test initial conditions file as readmsis has it before interpolation, and its raw columns"""
+    hd = tr.readionoheader(infn, tr.headbytes // tr.d_bytes)[0]
+    msis, raw = tr.readinitconddat(hd, infn)
+
+    return xarray.Dataset({"msis": msis}, attrs={"hd": hd}), raw
+
+
+def npinterp(z_new: np.ndarray, z: np.ndarray, raw: np.ndarray) -> np.ndarray:
+    return np.column_stack([np.interp(z_new, z, raw[:, j]) for j in range(raw.shape[1])])
+
+
+@pytest.mark.parametrize(
+    "dz, method, n", [([20.0], "linear", None), ([1.0], "incr", None), ([1.0], "tanh", 200), (None, "linear", 150)]
+)
+def test_interpdat(dz, method, n):
+    md, raw = initcond()
+    z = md.alt_km.values
+    z_new = tr.newaltgrid(z, dz, method, n)
+
+    if n is None:
+        iono, rawint = tr.interpdat(md, dz, raw, method)
+    else:
+        iono, rawint = tr.interpdat(md, None, raw, z_new=z_new)
+
+    assert iono.attrs["hd"]["nx"] == z_new.size
+    assert (iono.alt_km.values == z_new).all()
+    assert np.allclose(rawint, npinterp(z_new, z, raw))
+
+
+def test_interp_outside():
+    """NaN, or fill, where the new grid is outside the source grid"""
+    md, raw = initcond()
+    z = md.alt_km.values
+    z_new = np.concatenate(([z[0] - 10], np.linspace(z[0], z[-1], 100), [z[-1] + 10]))
+
+    out = tr.AltInterp(z, z_new)(raw)
+    assert np.isnan(out[[0, -1]]).all()
+    assert np.allclose(out[1:-1], npinterp(z_new[1:-1], z, raw))
+
+    assert (tr.AltInterp(z, z_new, fill=0)(raw)[[0, -1]] == 0).all()
+
+    with pytest.raises(ValueError):
+        tr.interpdat(md, None, raw, z_new=z_new)
+
+
+def test_float32(multitra, multiemis):
+    ref = tr.read_tra(multitra, memmap=True)
+    for kw in ({}, {"memmap": True}, {"tReq": (None, None)}):
+        iono = tr.read_tra(multitra, dtype=np.float32, **kw)
+        assert iono["iono"].dtype == iono["pp"].dtype == np.float32
+        assert np.allclose(iono["pp"], ref["pp"], rtol=1e-5, equal_nan=True)
+
+    rates = tr.readexcrates(multiemis, np.float32)
+    assert (rates.time.values == tr.readexcrates(multiemis).time.values).all()
+
+    exc = tr.ExcitationRates(multiemis, dtype=np.float32)
+    assert exc.dtype == np.float32
+    assert np.allclose(exc, tr.ExcitationRates(multiemis), rtol=1e-6)
+
+    msis = tr.readmsis(infn, dz=[20.0], newaltmethod="linear", dtype=np.float32)
+    assert msis["msis"].dtype == msis["pp"].dtype == np.float32
+
+    d = ref["iono"].loc[..., tr.PARAM].values
+    pp = tr.plasmaparam(d, tr.PARAM, 13, dtype=np.float32)
+    assert pp.dtype == np.float32
+    assert np.allclose(pp, tr.plasmaparam(d, tr.PARAM, 13), rtol=1e-5)
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+from pathlib import Path
+import numpy as np
+import pytest
+import xarray
+
+import transcarread as tr
+from transcarread.backend import TranscarBackendEntrypoint
+
+from conftest import write_emissions_grid
+
+infn = Path(__file__).parent / "data/beam52.7/dir.input/90kmmaxpt123.dat"
+
+
+def test_guess():
+    be = TranscarBackendEntrypoint()
+    assert be.guess_can_open("dir.output/transcar_output")
+    assert be.guess_can_open("dir.output/emissions.dat")
+    assert be.guess_can_open(infn)
+    assert not be.guess_can_open("foo.nc")
+
+
+def test_guess_dat(tmp_path):
+    """only .dat files with an initial conditions header are claimed"""
+    be = TranscarBackendEntrypoint()
+
+    text = tmp_path / "table.dat"
+    text.write_text("1 2 3\n" * 200)
+    short = tmp_path / "short.dat"
+    short.write_bytes(infn.read_bytes()[:1000])
+    baddate = tmp_path / "baddate.dat"
+    raw = np.fromfile(infn, np.float32)
+    raw[3] = 13  # month
+    raw.tofile(baddate)
+
+    for fn in (text, short, baddate, tmp_path / "missing.dat"):
+        assert not be.guess_can_open(fn)
+    with pytest.raises(ValueError):
+        xarray.open_dataset(text, engine="transcar")
+
+
+def test_backend_tra(multitra):
+    ref = tr.read_tra(multitra)
+
+    ds = xarray.open_dataset(multitra / "dir.output/transcar_output", engine="transcar")
+
+    assert (ds.time.values == ref.time.values).all()
+    assert ds.chi[0] == pytest.approx(ref.attrs["chi"])
+    assert np.allclose(ds["iono"][2:4, 30], ref["iono"].loc[..., tr.PARAM][2:4, 30])
+    assert np.allclose(ds["pp"][3], ref["pp"].loc[..., tr.ISRPARAM][3])
+    assert np.allclose(ds["pp"].sel(ppparam="Ti"), ref["pp"].loc[..., "Ti"])
+
+
+def test_backend_emissions(multiemis):
+    ref = tr.readexcrates(multiemis)
+
+    ds = xarray.open_dataset(multiemis, engine="transcar")
+
+    assert (ds.time.values == ref.time.values).all()
+    assert (ds.alt_km.values == ref.alt_km.values).all()
+    assert (ds["excitation"][1:3].values == ref["excitation"][1:3].values).all()
+    assert (ds["precip"][-1].values == ref["precip"][-1].values).all()
+
+
+def test_backend_emissions_layout(tmp_path):
+    """grid where lines per time step differ from a single stream of data and precip values"""
+    fn, exc, precip = write_emissions_grid(tmp_path, 125, 170, 3)
+
+    ds = xarray.open_dataset(fn, engine="transcar")
+
+    assert ds.time.size == 3
+    assert (ds["excitation"].values == exc[..., 1:]).all()
+    assert (ds["precip"].values == precip).all()
+
+
+def test_backend_initcond():
+    ref = tr.readmsis(infn)
+
+    ds = xarray.open_dataset(infn, engine="transcar")
+
+    assert np.allclose(ds["msis"].loc[:, "no1d"], ref["msis"].loc[:, "no1d"])
+    assert np.allclose(ds["pp"], ref["pp"].loc[:, tr.ISRPARAM])
+
+
+def test_backend_dask(multitra):
+    pytest.importorskip("dask")
+
+    ref = tr.read_tra(multitra)
+
+    ds = xarray.open_dataset(multitra / "dir.output/transcar_output", engine="transcar", chunks={"time": 2})
+
+    assert ds["pp"].chunks[0] == (2, 2, 1)
+    assert np.allclose(ds["pp"].mean("time"), ref["pp"].loc[..., tr.ISRPARAM].mean("time"))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+from pathlib import Path
+import shutil
+import numpy as np
+import pytest
+
+import transcarread as tr
+import transcarread.batch as trbatch
+
+infn = Path(__file__).parent / "data/beam52.7/dir.input/90kmmaxpt123.dat"
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    fns = []
+    for e in ("52.7", "100"):
+        fn = tmp_path / f"beam{e}/dir.input/90kmmaxpt123.dat"
+        fn.parent.mkdir(parents=True)
+        shutil.copy2(infn, fn)
+        fns.append(fn)
+    return fns
+
+
+def test_interpdat(tmp_path):
+    ofn = tmp_path / "interp.dat"
+    msis = tr.readmsis(infn, ofn, [20.0], "linear")
+    assert msis.alt_km[1] - msis.alt_km[0] == pytest.approx(20.0)
+    assert msis.attrs["hd"]["nx"] == msis.alt_km.size
+
+    hd, _ = tr.readionoheader(ofn, tr.headbytes // tr.d_bytes)
+    assert hd["nx"] == msis.alt_km.size
+    new = tr.readinitconddat(hd, ofn)[0]
+    assert np.allclose(new.alt_km, msis.alt_km)
+    assert np.allclose(new, msis["msis"].loc[:, new.isrparam], rtol=1e-6)
+    # pp computed from interpolated msis
+    assert np.allclose(msis["pp"].loc[:, "ne"], tr.compplasmaparam(new, hd["approx"]).loc[:, "ne"], rtol=1e-6)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch(inputs, tmp_path, workers):
+    specs = [trbatch.GridSpec.parse("linear:20"), trbatch.GridSpec.parse("incr:1")]
+    jobs = trbatch.plan(inputs, specs, tmp_path / "out")
+
+    assert len(jobs) == 4
+    assert jobs[0].op is jobs[2].op  # grid and interpolation computed once for both files
+    assert jobs[1].ofn == tmp_path / "out/incr_1/beam52.7/dir.input/90kmmaxpt123.dat"
+
+    times = trbatch.run(jobs, workers)
+    assert len(times) == 4 and set(times[0]) == {"read", "interp", "write"}
+
+    ref = tr.readmsis(infn, dz=[20.0], newaltmethod="linear")
+    for j in jobs:
+        assert not list(j.ofn.parent.glob(".*.tmp"))
+        if j.spec.method == "linear":
+            assert j.ofn.read_bytes() == jobs[0].ofn.read_bytes()
+            hd = tr.readionoheader(j.ofn, tr.headbytes // tr.d_bytes)[0]
+            new = tr.readinitconddat(hd, j.ofn)[0]
+            assert np.allclose(new, ref["msis"].loc[:, new.isrparam], rtol=1e-6)
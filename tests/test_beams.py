@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+from pathlib import Path
+from datetime import datetime
+import shutil
+import numpy as np
+import pytest
+
+import transcarread as tr
+import transcarread.beams as trb
+
+beamdir = Path(__file__).parent / "data/beam52.7"
+
+
+@pytest.fixture
+def beamroot(tmp_path):
+    for e in ("100", "52.7", "3000"):
+        shutil.copytree(beamdir, tmp_path / f"beam{e}")
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_read_beams(beamroot, workers):
+    ref = tr.ExcitationRates(beamdir / tr.KINFN)
+
+    beams = trb.read_beams(beamroot, workers=workers, batch=2)
+
+    assert beams.beam_energy_eV.values.tolist() == [52.7, 100, 3000]
+    assert beams["excitation"].dims == ("beam_energy_eV", "time", "alt_km", "reaction")
+    for e in beams.beam_energy_eV:
+        assert (beams["excitation"].sel(beam_energy_eV=e).values == ref.values).all()
+
+
+def test_read_beams_ver(beamroot):
+    tReq = datetime(2013, 3, 31, 9, 0, 21)
+    dirs = [beamroot / "beam3000", beamroot / "beam52.7"]
+
+    beams = trb.read_beams(dirs, "ver", workers=1, tReq=tReq)
+
+    assert beams.beam_energy_eV.values.tolist() == [3000, 52.7]
+    assert beams["excitation"].loc[52.7, :, "no1d"][53] == pytest.approx(15638.62)
+
+
+def test_read_beams_iono(beamroot):
+    beams = trb.read_beams(beamroot, "iono", workers=1)
+
+    assert beams["pp"].dims[0] == "beam_energy_eV"
+    assert np.isfinite(beams["pp"].loc[..., "ne"]).all()
+
+
+def test_eigenprofiles(beamroot, tmp_path):
+    tReq = datetime(2013, 3, 31, 9, 0, 21)
+    ref = tr.calcVERtc(beamdir, tReq, "DATCAR")
+    alt = np.array([85.0, 100.0, 200.0, 500.0])
+
+    P = trb.eigenprofiles(beamroot, tReq, alt, workers=1)
+
+    assert P.dims == ("alt_km", "beam_energy_eV", "reaction")
+    assert P.shape == (4, 3, 10)
+    assert np.isnan(P[0]).all()  # below grid
+    for r in ("no1d", "p1ng"):
+        assert np.allclose(P.loc[100:, 52.7, r], np.interp(alt[1:], ref.alt_km, ref.loc[:, r]))
+
+    fn = tmp_path / "peigen"
+    trb.save_eigenprofiles(P, fn)
+    P2 = trb.load_eigenprofiles(fn)
+    assert np.allclose(P2, P, equal_nan=True)
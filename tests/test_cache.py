@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+import os
+import numpy as np
+import pytest
+
+import transcarread as tr
+import transcarread.cache as trc
+
+
+def test_cache_tra(multitra):
+    tcofn = multitra / "dir.output/transcar_output"
+    ref = tr.read_tra(multitra)
+
+    iono = tr.read_tra(multitra, cache=True)
+    cdir = multitra / "dir.cache"
+    assert len(list(cdir.iterdir())) == 1
+
+    hit = tr.read_tra(multitra, cache=True)
+    for ds in (iono, hit):
+        assert np.allclose(ds["pp"], ref["pp"], equal_nan=True)
+        assert (ds.time.values == ref.time.values).all()
+        assert ds.attrs["chi"] == pytest.approx(ref.attrs["chi"])
+
+    one = tr.read_tra(multitra, "2013-03-31T09:00:02", cache=True)
+    assert one.time.values == ref.time.values[2]
+    # %% modified file gets new entry
+    st = tcofn.stat()
+    os.utime(tcofn, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    tr.read_tra(multitra, cache=True)
+    assert len(list(cdir.iterdir())) == 2
+
+
+def test_cache_excitation(multiemis, tmp_path):
+    ref = tr.ExcitationRates(multiemis)
+
+    cdir = tmp_path / "cache"
+    for _ in range(2):
+        rates = tr.ExcitationRates(multiemis, cache=cdir)
+        assert (rates.values == ref.values).all()
+        assert (rates.reaction.values == ref.reaction.values).all()
+    assert len(list(cdir.iterdir())) == 1
+
+
+def test_cache_evict(multiemis, tmp_path):
+    cdir = tmp_path / "cache"
+    ds = tr.readexcrates(multiemis)
+
+    trc.save(cdir, "a", ds)
+    os.utime(cdir / "a", (0, 0))  # oldest
+    trc.save(cdir, "b", ds)
+    size = sum(f.stat().st_size for f in (cdir / "b").iterdir())
+    trc.save(cdir, "c", ds, maxbytes=2 * size)
+
+    assert sorted(e.name for e in cdir.iterdir()) == ["b", "c"]
+
+
+def test_cache_failures(multiemis, tmp_path, monkeypatch):
+    """cache problems fall back to parsing, never failing the read"""
+    ref = tr.ExcitationRates(multiemis)
+    # cache directory can't be made
+    notdir = tmp_path / "file"
+    notdir.write_text("")
+    assert (tr.ExcitationRates(multiemis, cache=notdir / "cache").values == ref.values).all()
+    # entry lost a file, e.g. evicted by another process while loading
+    cdir = tmp_path / "cache"
+    tr.ExcitationRates(multiemis, cache=cdir)
+    entry = next(cdir.iterdir())
+    (entry / "0.npy").unlink()
+    assert trc.load(entry) is None
+    assert (tr.ExcitationRates(multiemis, cache=cdir).values == ref.values).all()
+    # entry removed by another process during eviction
+    trc.save(cdir, "gone", tr.readexcrates(multiemis))
+    iterdir = type(cdir).iterdir
+
+    def racing(self):
+        if self.name == "gone":
+            raise FileNotFoundError(self)
+        return iterdir(self)
+
+    monkeypatch.setattr(type(cdir), "iterdir", racing)
+    trc.evict(cdir, 0)
+    monkeypatch.undo()
+    assert [e.name for e in cdir.iterdir()] == ["gone"]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+import transcarread as tr
+import transcarread.compare as trc
+from conftest import write_tra
+
+
+def test_compare(multitra, tmp_path):
+    same = write_tra(tmp_path / "same", 5)
+    changed = write_tra(tmp_path / "changed", 5)
+    # change n1 at record 3, altitude 40
+    fn = changed / "dir.output/transcar_output"
+    hd = tr.traheader(fn)
+    raw = np.fromfile(fn, np.float32).reshape((5, hd["size_record"]))
+    raw[3, tr.nhead + 40 * hd["ncol"] + 1] *= 2
+    raw.tofile(fn)
+
+    stats = trc.compare([multitra, same, changed], chunk=2)
+
+    assert stats.run.size == 2
+    s = stats.isel(run=0)
+    assert (s.max_abs == 0).all() and s.first_time.isnull().all()
+
+    s = stats.isel(run=1)
+    ref = tr.read_tra(multitra, memmap=True)
+    n1 = s.sel(param="n1")
+    assert n1.max_abs == pytest.approx(float(ref["iono"].loc[..., "n1"][3, 40]))
+    assert n1.first_time.values == ref.time.values[3]
+    assert n1.first_alt_km == pytest.approx(float(ref.alt_km[40]))
+    assert not s.sel(param="ne").first_time.isnull()
+    assert s.sel(param="Te").first_time.isnull()
+
+
+def test_compare_align(multitra, tmp_path):
+    """run with every other record compares at the nearest record"""
+    sparse = tmp_path / "sparse"
+    fn = write_tra(sparse, 5) / "dir.output/transcar_output"
+    hd = tr.traheader(fn)
+    raw = np.fromfile(fn, np.float32).reshape((5, hd["size_record"]))
+    raw[::2].tofile(fn)
+
+    stats = trc.compare([multitra, sparse])
+
+    assert stats.time_offset.values[0] == np.timedelta64(1, "s")
+    assert stats.max_abs.sel(param="n1")[0] > 0
+    assert stats.sel(param="n1").first_time.values[0] == np.datetime64("2013-03-31T09:00:01")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+from pathlib import Path
+import os
+import numpy as np
+import pytest
+import xarray
+
+import transcarread as tr
+from transcarread.convert import convert
+
+
+@pytest.mark.parametrize("suffix,lib", [(".zarr", "zarr"), (".nc", "netCDF4")])
+def test_convert_tra(multitra, tmp_path, suffix, lib):
+    pytest.importorskip(lib)
+    ref = tr.read_tra(multitra)
+
+    out = convert(multitra / "dir.output/transcar_output", tmp_path / f"out{suffix}", {"time": 2, "alt_km": 100})
+
+    with xarray.open_dataset(out, engine="zarr" if suffix == ".zarr" else "netcdf4") as ds:
+        assert ds.attrs["records_written"] == 5
+        assert ds.attrs["hd_nx"] == ds.alt_km.size == ref.alt_km.size
+        assert (ds.time.values == ref.time.values).all()
+        assert list(ds.isrparam.values) == tr.PARAM
+        assert ds.chi[0] == pytest.approx(ref.attrs["chi"])
+        assert np.allclose(ds["iono"], ref["iono"].loc[..., tr.PARAM])
+        assert np.allclose(ds["pp"].sel(ppparam="Ti"), ref["pp"].loc[..., "Ti"])
+
+
+def test_convert_reads_once(multitra, tmp_path):
+    """each record is read once, for all variables of its block"""
+    pytest.importorskip("zarr")
+
+    with tr.instrument() as spans:
+        convert(multitra / "dir.output/transcar_output", tmp_path / "out.zarr", {"time": 2})
+
+    # first record for altitudes at open, then each block
+    assert [s.records for s in spans if s.name == "readrecords"] == [1, 2, 2, 1]
+
+
+def test_convert_resume(multiemis, tmp_path):
+    zarr = pytest.importorskip("zarr")
+    ref = tr.readexcrates(multiemis)
+    out = tmp_path / "emis.zarr"
+
+    convert(multiemis, out, {"time": 1})
+    # simulate interruption after the first 2 time steps
+    g = zarr.open_group(str(out), mode="r+")
+    g["excitation"][2:] = 0
+    g.attrs["records_written"] = 2
+
+    convert(multiemis, out, {"time": 1})
+
+    with xarray.open_zarr(out) as ds:
+        assert (ds.time.values == ref.time.values).all()
+        assert np.allclose(ds["excitation"], ref["excitation"])
+        assert np.allclose(ds["precip"], ref["precip"])
+
+
+def test_convert_resume_changed(multiemis, tmp_path, monkeypatch):
+    pytest.importorskip("zarr")
+    out = tmp_path / "emis.zarr"
+
+    convert(multiemis, out, {"time": 1})
+    # same file by another path resumes
+    monkeypatch.chdir(multiemis.parent)
+    convert(Path(multiemis.name), out, {"time": 1})
+
+    # same number of time steps, changed values
+    st = multiemis.stat()
+    multiemis.write_text(multiemis.read_text().replace("E+", "E-"))
+    os.utime(multiemis, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))  # coarse filesystem timestamps
+    with pytest.raises(ValueError):
+        convert(multiemis, out, {"time": 1})
+
+    convert(multiemis, out, {"time": 1}, resume=False)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+import pytest
+import numpy as np
+import xarray
+
+import transcarread as tr
+import transcarread.follow as trf
+
+from conftest import write_emissions_grid
+
+
+def grow(fn, whole: bytes, cuts):
+    """write whole to fn in pieces ending at each of cuts, yielding after each"""
+    fn.parent.mkdir(parents=True, exist_ok=True)
+    i = 0
+    with fn.open("wb") as f:
+        for c in cuts:
+            f.write(whole[i:c])
+            f.flush()
+            i = c
+            yield c
+
+
+def test_growing():
+    g = trf.Growing((2,), float, capacity=2)
+    for i in range(5):
+        g.append(np.full((i, 2), i))
+    assert g.n == 10 and g._buf.shape[0] == 16
+    assert (g.values[:, 0] == np.repeat(np.arange(5), np.arange(5))).all()
+
+
+def test_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        trf.Follower(tmp_path / "out")
+
+
+def test_tra(multitra, tmp_path):
+    ref = tr.read_tra(multitra, memmap=True)
+    whole = (multitra / "dir.output/transcar_output").read_bytes()
+    size = len(whole) // ref.time.size
+
+    live = tmp_path / "live"
+    f = trf.TraFollower(live)
+    assert f.poll() is None and f.data is None  # not started
+
+    n = []
+    for c in grow(live / "dir.output/transcar_output", whole, [100, size // 2, 3 * size + 10, 3 * size + 20, len(whole)]):
+        new = f.poll()
+        n.append(0 if new is None else new.time.size)
+        assert f.n_t == c // size
+        assert f.offset == f.n_t * size
+    assert n == [0, 0, 3, 0, 2]
+    assert f.poll() is None
+
+    xarray.testing.assert_equal(f.data, ref)
+    assert f.data.iono.attrs["filename"] == str(f.fn)
+
+
+def test_tra_nokeep(multitra, tmp_path):
+    whole = (multitra / "dir.output/transcar_output").read_bytes()
+    size = len(whole) // 5
+
+    live = tmp_path / "live"
+    f = trf.TraFollower(live, keep=False)
+    n = [f.poll().time.size for _ in grow(live / "dir.output/transcar_output", whole, [2 * size, len(whole)])]
+    assert n == [2, 3]
+    assert f.n_t == 5 and not f._bufs
+    with pytest.raises(ValueError):
+        f.data
+
+
+def test_tra_restart(multitra, tmp_path):
+    whole = (multitra / "dir.output/transcar_output").read_bytes()
+    size = len(whole) // 5
+
+    live = tmp_path / "live"
+    f = trf.TraFollower(live)
+    for _ in grow(live / "dir.output/transcar_output", whole, [4 * size]):
+        assert f.poll().time.size == 4
+    for _ in grow(live / "dir.output/transcar_output", whole, [size]):
+        assert f.poll().time.size == 1
+    assert f.n_t == 1
+
+
+def test_emissions(multiemis, tmp_path):
+    ref = tr.readexcrates(multiemis, np.float32)
+    whole = multiemis.read_bytes()
+    step = len(whole) // ref.time.size
+
+    live = tmp_path / "live"
+    f = trf.EmissionsFollower(live, dtype=np.float32)
+    n = []
+    for c in grow(live / tr.KINFN, whole, [20, step - 1, step, 3 * step + step // 2, len(whole)]):
+        new = f.poll()
+        n.append(0 if new is None else new.time.size)
+    assert n == [0, 0, 1, 2, 1]
+    assert f.offset == len(whole)
+
+    data = f.data
+    assert data.excitation.dtype == np.float32
+    xarray.testing.assert_identical(data, ref)
+
+
+def test_emissions_layout(tmp_path):
+    """grid where lines per time step differ from a single stream of data and precip values"""
+    fn, exc, precip = write_emissions_grid(tmp_path / "src", 125, 170, 3)
+    whole = fn.read_bytes()
+
+    live = tmp_path / "live"
+    f = trf.EmissionsFollower(live)
+    n = []
+    for c in grow(live / tr.KINFN, whole, [len(whole) // 2, len(whole)]):
+        new = f.poll()
+        n.append(0 if new is None else new.time.size)
+    assert n == [1, 2]
+
+    assert (f.data["excitation"].values == exc[..., 1:]).all()
+    assert (f.data["precip"].values == precip).all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
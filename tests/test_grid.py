@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+from transcarread.grid import altgrid, toobig
+from transcarread.ztanh import setupz
+
+
+def incrloop(z0: float, z1: float, dz: float) -> np.ndarray:
+    """the former interpdat "incr" loop"""
+    z = [z0]
+    cdz = dz
+    while (z[-1] + cdz) < z1:
+        z.append(z[-1] + cdz)
+        cdz += dz
+    return np.asarray(z)
+
+
+@pytest.mark.parametrize("dz", [0.1, 0.37, 1.0, 3.3])
+def test_spacing(dz):
+    assert np.allclose(altgrid(90.0, 3000.0, "incr", (dz,)), incrloop(90.0, 3000.0, dz))
+    assert np.allclose(altgrid(90.0, 3000.0, "linear", (dz,)), np.arange(90.0, 3000.0, dz))
+    assert np.allclose(altgrid(90.0, 3000.0, "tanh", (dz, 5.0), 123), setupz(123, 90.0, dz, 5.0))
+
+
+@pytest.mark.parametrize("method,dz", [("linear", ()), ("incr", ()), ("tanh", (1.0,))])
+def test_count(method, dz):
+    z = altgrid(90.0, 3000.0, method, dz, 250)
+    assert z.size == 250
+    assert z[0] == 90.0 and z[-1] == pytest.approx(3000.0)
+    assert (np.diff(z) > 0).all()
+
+    with pytest.raises(ValueError):
+        altgrid(90.0, 3000.0, method, dz, toobig + 1)
+
+
+def test_memo():
+    z = altgrid(90.0, 500.0, "incr", (0.5,))
+    assert altgrid(90.0, 500.0, "incr", (0.5,)) is z
+    assert not z.flags.writeable
+
+    with pytest.raises(ValueError):
+        altgrid(90.0, 3000.0, "tanh", (20.0,), 200)  # minimum spacing too large to fit
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""
+import time of transcarread, which short-lived worker processes pay on every start
+"""
+import subprocess
+import sys
+import pytest
+
+HEAVY = ("xarray", "pandas", "scipy", "matplotlib", "dask")
+BUDGET = 0.25  # seconds beyond importing numpy
+
+
+def import_time(module: str) -> float:
+    """best of 3 fresh interpreter import times, and the heavy modules it loaded"""
+    code = f"""
+import sys, time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t, *[m for m in {HEAVY!r} if m in sys.modules])
+"""
+    runs = [subprocess.check_output([sys.executable, "-c", code], universal_newlines=True).split() for _ in range(3)]
+    assert all(r[1:] == [] for r in runs), f"import {module} loaded {runs[0][1:]}"
+
+    return min(float(r[0]) for r in runs)
+
+
+@pytest.mark.parametrize("module", ["transcarread", "transcarread.plots"])
+def test_import_time(module):
+    base = import_time("numpy")
+
+    assert import_time(module) - base < BUDGET
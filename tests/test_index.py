@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+import numpy as np
+
+import transcarread as tr
+import transcarread.index as tri
+from conftest import write_tra
+
+
+def test_index(multitra):
+    tcofn = multitra / "dir.output/transcar_output"
+    ref = tr.read_tra(multitra)
+
+    index = tr.read_index(tcofn, persist=False)
+    assert not tri.indexfile(tcofn).exists()
+    assert (index["time"] == ref.time.values).all()
+    assert (index["offset"] == np.arange(5) * tri.record_size(tcofn) * 4).all()
+    assert index["chi"][0] == ref.attrs["chi"]
+    assert (index["approx"] == 13).all()
+    assert (index["nx"] == ref.alt_km.size).all()
+
+
+def test_index_persist(multitra, monkeypatch):
+    tcofn = multitra / "dir.output/transcar_output"
+
+    iono = tr.read_tra(multitra, "2013-03-31T09:00:02", index=True)
+    assert tri.indexfile(tcofn).is_file()
+
+    scans = []
+    scan = tri.scan_index
+    monkeypatch.setattr(tri, "scan_index", lambda fn, start=0: scans.append(start) or scan(fn, start))
+
+    assert tr.read_tra(multitra, "2013-03-31T09:00:02", index=True).identical(iono)
+    assert not scans
+    # %% file grew: only new records scanned
+    nbytes = tri.record_size(tcofn) * 4
+    more = write_tra(multitra.parent / "more", 7) / "dir.output/transcar_output"
+    with tcofn.open("ab") as f:
+        f.write(more.read_bytes()[-2 * nbytes:])
+
+    index = tr.read_index(tcofn)
+    assert scans == [5]
+    assert index.size == 7
+    assert index["time"][-1] == np.datetime64("2013-03-31T09:00:06")
+
+
+def test_index_corrupt(multitra):
+    tcofn = multitra / "dir.output/transcar_output"
+    ifn = tri.indexfile(tcofn)
+    ref = tr.read_index(tcofn, persist=False)
+
+    ifn.write_bytes(b"PK\x03\x04 half written")
+    assert (tr.read_index(tcofn)["time"] == ref["time"]).all()
+    # rebuilt index replaced the corrupt one, with no temporary files left
+    assert (tri._load(ifn)[0] == ref).all()
+    assert sorted(p.name for p in ifn.parent.iterdir()) == sorted([tcofn.name, ifn.name])
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+import transcarread as tr
+from transcarread.layout import layout, INITPARAM
+
+
+def test_tra():
+    lay = layout("tra", 13.0, 63)
+    assert lay is layout("tra", 13, 63)  # compiled once
+    assert not lay.columns.flags.writeable
+    assert lay.names == tuple(tr.PARAM)
+    assert lay.columns.tolist() == [1, 2, 3, 4, 5, 6, 49] + list(range(7, 22))
+
+    old = layout("tra", 12, 63)
+    assert old.columns[-9:].tolist() == [12, 13, 13, 14, 14, 15, 15, 16, 16]
+
+    data = np.arange(3 * 4 * 63).reshape((3, 4, 63))
+    assert (lay.take(data) == data[..., lay.columns]).all()
+
+
+def test_initcond():
+    lay = layout("initcond", 13, 63)
+    assert lay.names == tuple(INITPARAM)
+    assert lay.columns.tolist() == list(range(1, 34)) + [60, 61, 62, 49]
+
+    assert len(layout("initcond", 13, 50).names) == 34
+
+    with pytest.raises(ValueError):
+        layout("tra", 13, 20)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+import asyncio
+import threading
+import time
+import pytest
+import xarray
+
+import transcarread as tr
+from transcarread.monitor import Monitor
+
+from conftest import write_tra
+
+
+def append(src, dst, i0, i1):
+    """append records i0:i1 of transcar_output src to dst"""
+    whole = (src / "dir.output/transcar_output").read_bytes()
+    size = len(whole) // 5
+    fn = dst / "dir.output/transcar_output"
+    fn.parent.mkdir(parents=True, exist_ok=True)
+    with fn.open("ab") as f:
+        f.write(whole[i0 * size: i1 * size])
+
+
+async def wait_for(cond, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if cond():
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
+def test_monitor(multitra, tmp_path):
+    ref = tr.read_tra(multitra, memmap=True)
+    runs = [tmp_path / f"beam{i}" for i in range(3)]
+
+    async def main():
+        async with Monitor(runs, interval=0.01, workers=2) as mon:
+            got = {r: [] for r in runs}
+            for i0, i1 in [(0, 2), (2, 3), (3, 5)]:
+                for r in runs:
+                    append(multitra, r, i0, i1)
+                for r in runs:
+                    u = await asyncio.wait_for(mon.queues[r].get(), 5)
+                    assert u.run == r and u.kind == "tra" and u.error is None
+                    got[r].append(u.data)
+            return got
+
+    got = asyncio.run(main())
+
+    for r in runs:
+        assert [d.time.size for d in got[r]] == [2, 1, 2]
+        xarray.testing.assert_equal(xarray.concat(got[r], "time"), ref)
+
+
+def test_aiter(multitra, tmp_path):
+    runs = [tmp_path / f"beam{i}" for i in range(4)]
+
+    async def main():
+        async with Monitor(runs, interval=0.01) as mon:
+            for r in runs:
+                append(multitra, r, 0, 5)
+            got = set()
+            async for u in mon:
+                got.add(u.run)
+                if len(got) == len(runs):
+                    return got
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) == set(runs)
+
+
+def test_backpressure(tmp_path):
+    src = write_tra(tmp_path / "src", 5)
+    slow, fast = tmp_path / "slow", tmp_path / "fast"
+
+    async def main():
+        async with Monitor([slow, fast], interval=0.01, maxsize=1) as mon:
+            fs, ff = mon.followers[slow][0], mon.followers[fast][0]
+            for i in range(4):
+                append(src, slow, i, i + 1)
+                append(src, fast, i, i + 1)
+                await wait_for(lambda: ff.n_t == i + 1)
+                await mon.queues[fast].get()
+                await wait_for(lambda: fs.n_t >= min(i + 1, 2))
+            # slow consumer never read: one update queued, one decoded waiting to be queued, the rest left in the file
+            await asyncio.sleep(0.1)
+            assert mon.queues[slow].qsize() == 1
+            assert fs.n_t == 2
+
+            updates = [mon.queues[slow].get_nowait()]
+            await wait_for(lambda: fs.n_t == 4)
+            updates.append(await mon.queues[slow].get())
+            updates.append(await mon.queues[slow].get())
+            return updates
+
+    updates = asyncio.run(main())
+    assert sum(u.data.time.size for u in updates) == 4
+
+
+def test_error(tmp_path):
+    run = tmp_path / "bad"
+    fn = run / "dir.output/transcar_output"
+    fn.parent.mkdir(parents=True)
+    fn.write_bytes(b"\xff" * 10_000)
+
+    async def main():
+        async with Monitor([run], interval=0.01) as mon:
+            return await asyncio.wait_for(mon.queues[run].get(), 5)
+
+    u = asyncio.run(main())
+    assert u.data is None and u.error is not None
+
+
+def test_aiter_ends(multitra, tmp_path):
+    """iteration ends once every run's task has ended, after delivering what was queued"""
+    bad = tmp_path / "bad"
+    fn = bad / "dir.output/transcar_output"
+    fn.parent.mkdir(parents=True)
+    fn.write_bytes(b"\xff" * 10_000)
+
+    async def errors():
+        async with Monitor([bad], interval=0.01) as mon:
+            return [u async for u in mon]
+
+    updates = asyncio.run(asyncio.wait_for(errors(), 5))
+    assert len(updates) == 1 and updates[0].error is not None
+
+    good = tmp_path / "good"
+
+    async def stopped():
+        async with Monitor([good], interval=10) as mon:
+            consumer = asyncio.ensure_future(mon.__aiter__().__anext__())
+            await asyncio.sleep(0.05)
+            assert not consumer.done()
+            await mon.stop()
+            with pytest.raises(StopAsyncIteration):
+                await consumer
+
+    asyncio.run(asyncio.wait_for(stopped(), 5))
+
+
+def test_no_history(multitra, tmp_path):
+    """followers of the monitor keep no records, only the queues hold them"""
+    run = tmp_path / "beam"
+
+    async def main():
+        async with Monitor([run], interval=0.01) as mon:
+            for i in range(5):
+                append(multitra, run, i, i + 1)
+                await asyncio.wait_for(mon.queues[run].get(), 5)
+            return mon.followers[run][0]
+
+    f = asyncio.run(main())
+    assert f.n_t == 5 and not f._bufs
+    with pytest.raises(ValueError):
+        f.data
+
+
+def test_stop_nonblocking(multitra, tmp_path):
+    """stop() waits for a decode still running in the pool without blocking the event loop"""
+    run = tmp_path / "beam"
+    started = threading.Event()
+
+    async def main():
+        mon = Monitor([run], interval=0.01)
+        mon.start()
+        f = mon.followers[run][0]
+        poll = f.poll
+
+        def slow():
+            started.set()
+            time.sleep(0.3)
+            return poll()
+
+        f.poll = slow
+        append(multitra, run, 0, 1)
+        await wait_for(started.is_set)
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await mon.stop()
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) > 5
+
+
+def test_args():
+    with pytest.raises(ValueError):
+        Monitor([], maxsize=0)
+    with pytest.raises(ValueError):
+        Monitor([], kinds=["nope"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+from pathlib import Path
+import numpy as np
+import pytest
+
+import transcarread as tr
+from conftest import write_tra
+
+pytest.importorskip("matplotlib")
+import transcarread.plots as plots  # noqa: E402
+
+beamdir = Path(__file__).parent / "data/beam52.7"
+
+
+def test_decimate():
+    time = np.datetime64("2013-03-31T09:00:00") + np.arange(1000).astype("timedelta64[s]")
+    y = np.random.default_rng(0).random((1000, 3))
+    y[123, 1] = 5.0
+    y[800, 2] = -5.0
+
+    t, d = plots.decimate(time, y, 50)
+    assert t.size == d.shape[0] == 100
+    assert d.max() == 5.0 and d.min() == -5.0
+    assert np.allclose(d[0::2].min(axis=0), y.min(axis=0))
+    assert (np.diff(t) >= np.timedelta64(0)).all()
+
+    assert plots.decimate(time, y, 500)[1] is y
+
+
+def test_render_isr(tmp_path):
+    iono = tr.read_tra(write_tra(tmp_path / "beam52.7", 8))
+    tctime = tr.readTranscarInput(beamdir / "dir.input/DATCAR")
+
+    fns = plots.render_isr(iono, tmp_path / "ql", tctime, ["ne", "Ti"], verbose=True, width=2, workers=2)
+
+    assert [f.name for f in fns] == ["ne.png", "Ti.png"] + [f"n{i}.png" for i in range(1, 7)]
+    assert all(f.stat().st_size > 0 for f in fns)
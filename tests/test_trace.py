@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+import pytest
+from pytest import approx
+import tracemalloc
+import numpy as np
+
+import transcarread as tr
+import transcarread.trace as trace
+
+
+def test_disabled(multitra):
+    assert trace.span("read_tra") is trace.NOSPAN
+    with trace.span("read_tra") as s:
+        s.add(nbytes=1, records=1)
+
+    tr.read_tra(multitra)
+    assert not trace._hooks
+
+
+@pytest.mark.parametrize("memmap", [False, True])
+def test_read_tra(multitra, memmap):
+    seen = []
+    with tr.instrument(seen.append) as spans:
+        iono = tr.read_tra(multitra, memmap=memmap)
+
+    assert spans == seen
+    assert not trace._hooks
+    assert spans[-1].name == "read_tra" and spans[-1].parent == ""
+    assert all(s.wall_s >= 0 and s.peak_bytes is None for s in spans)
+    assert spans[-1].wall_s >= max(s.wall_s for s in spans[:-1])
+
+    names = {s.name for s in spans}
+    assert {"traheader", "decode", "plasmaparam"} <= names
+    assert ("readrecords" in names) != memmap
+
+    n_t = iono.time.size
+    read = [s for s in spans if s.name in ("readrecords", "mmapread")]
+    assert sum(s.bytes_read for s in read) == (multitra / "dir.output/transcar_output").stat().st_size
+    assert sum(s.records for s in read) == n_t
+    assert sum(s.records for s in spans if s.name == "decode") == n_t
+
+
+def test_seek(multitra):
+    t = tr.read_tra(multitra).time.values
+    with tr.instrument() as spans:
+        tr.read_tra(multitra, tReq=[t[1], t[3]])
+
+    read = [s for s in spans if s.name == "readrecords"]
+    assert len(read) == 1 and read[0].records == 2 and read[0].parent == "read_tra"
+    assert spans[0].name == "traheader"
+
+
+def test_excrates(multiemis):
+    with tr.instrument() as spans:
+        rates = tr.readexcrates(multiemis)
+
+    bytes_read = {s.name: s.bytes_read for s in spans}
+    # the file is scanned twice: counting lines, then parsing
+    assert bytes_read["reademissions"] == 2 * multiemis.stat().st_size
+    assert [s.name for s in spans] == ["reademissions", "decode", "readexcrates"]
+    assert spans[1].parent == "readexcrates"
+    assert spans[0].records == spans[1].records == rates.time.size
+
+
+def test_memory():
+    tracing = tracemalloc.is_tracing()
+
+    with tr.instrument(memory=True) as spans:
+        with trace.span("outer"):
+            with trace.span("inner"):
+                x = np.ones(1_000_000)
+                del x
+            y = np.ones(10_000)
+        del y
+
+    inner, outer = spans
+    assert inner.peak_bytes == approx(8e6, rel=0.05)
+    # the peak of the nested span counts toward the enclosing span
+    assert outer.peak_bytes >= inner.peak_bytes
+    assert tracemalloc.is_tracing() == tracing
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
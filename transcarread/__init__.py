@@ -1,14 +1,26 @@
+from __future__ import annotations
 import logging
+import os
 from pathlib import Path
 from datetime import datetime, timedelta
 import numpy as np
-from scipy.interpolate import interp1d
-import xarray
-from typing import Tuple, Union, List, IO, Any
+from typing import Tuple, Union, List, IO, Any, Dict, Iterator, TYPE_CHECKING
 
 #
-from .ztanh import setupz
-from .io import readTranscarInput, readionoheader, parseionoheader
+from .grid import altgrid, toobig
+from .interp import AltInterp
+from .io import readTranscarInput, readionoheader, parseionoheader, parseionoheaders, headtimes, reademissions
+from .plasma import ISRPARAM, plasmaparam
+from .cache import cached
+from .index import read_index
+from .layout import PARAM, layout
+from .lazy import lazymodule
+from .trace import span, instrument
+
+if TYPE_CHECKING:
+    import xarray
+else:
+    xarray = lazymodule("xarray")
 
 #
 nhead = 126  # a priori from transconvec_13
@@ -20,34 +32,8 @@ d_bytes = 4
 # from inspection of "good" .dat file, x1F8=d504, 504 gets us up to this point
 headbytes = 504
 
-toobig = 300  # beyond which number of altitude cells transcar will crash
-
-
-ISRPARAM = ["ne", "vi", "Ti", "Te"]
-PARAM = [
-    "n1",
-    "n2",
-    "n3",
-    "n4",
-    "n5",
-    "n6",
-    "n7",
-    "v1",
-    "v2",
-    "v3",
-    "vm",
-    "ve",
-    "t1p",
-    "t1t",
-    "t2p",
-    "t2t",
-    "t3p",
-    "t3t",
-    "tmp",
-    "tmt",
-    "tep",
-    "tet",
-]
+
+REACTION = ["no1d", "no1s", "noii2p", "nn2a3", "po3p3p", "po3p5p", "p1ng", "pmein", "p2pg", "p1pg"]
 KINFN = "dir.output/emissions.dat"
 
 
@@ -71,7 +57,9 @@ def read_precinput(path: Path) -> np.ndarray:
     return np.loadtxt(path, delimiter=" ", skiprows=1, max_rows=34)
 
 
-def read_tra(path: Path, tReq: datetime = None) -> xarray.DataArray:
+def read_tra(
+    path: Path, tReq=None, memmap: bool = False, cache: Union[bool, Path] = False, index: bool = False, dtype=None
+) -> xarray.DataArray:
     """
     reads binary "transcar_output" file
     many more quantities exist in the binary file, these are the ones we use so far.
@@ -82,7 +70,17 @@ def read_tra(path: Path, tReq: datetime = None) -> xarray.DataArray:
     Parameters
     ----------
     tcofn: path/filename of transcar_output file
-    tReq: optional, datetime at which to extract data from file (will still read whole file first)
+    tReq: optional, time(s) at which to extract data from file. Only the needed records are read.
+        datetime or str: nearest record, time dimension is dropped
+        list of datetime or str: nearest record to each time
+        (tstart, tend) tuple: all records in closed interval, either end may be None
+    memmap: read all records at once from a memory map instead of record by record (faster for long runs)
+    cache: keep the parsed file in an on-disk cache (True: "dir.cache" next to "dir.output", or cache directory path),
+        later calls memory-map the cached arrays while the file is unchanged
+    index: with tReq, save the record header index next to the file ("transcar_output.index.npz"),
+        so later time lookups don't rescan the file
+    dtype: precision of iono and pp, default float32 iono as in the file and float64 pp.
+        numpy.float32 keeps everything float32, halving memory of pp.
 
     variables:
     n_t: number of time steps in file
@@ -94,20 +92,94 @@ def read_tra(path: Path, tReq: datetime = None) -> xarray.DataArray:
     """
     tcofn = path / "dir.output/transcar_output"
 
-    hd = readionoheader(tcofn, nhead)[0]
+    with span("read_tra"):
+        hd = traheader(tcofn)
+        # %% read data based on header
+        if cache:
+            iono = cached(tcofn, _readername("read_tra", dtype), lambda: mmapread(tcofn, hd, dtype=dtype), cache)
+            if tReq is not None:
+                iono = iono.isel(time=timeindex(iono.time.values, tReq))
+        elif tReq is not None:
+            iono = seekread(tcofn, hd, tReq, index, dtype)
+        elif memmap:
+            iono = mmapread(tcofn, hd, dtype=dtype)
+        else:
+            iono = loopread(tcofn, hd, dtype=dtype)
+
+    return iono
+
+
+def traheader(tcofn: Path) -> Dict[str, Any]:
+    """header of the first record of transcar_output, with the record sizes used to step through the file"""
+    with span("traheader") as s:
+        hd = readionoheader(tcofn, nhead)[0]
+        s.add(nbytes=nhead * d_bytes, records=1)
 
     hd["size_head"] = 2 * hd["ncol"]  # +2 by defn of transconvec_13
     hd["size_data_record"] = hd["nx"] * hd["ncol"]  # data without header
     hd["size_record"] = hd["size_head"] + hd["size_data_record"]
 
     assert hd["size_head"] == nhead
-    # %% read data based on header
-    iono = loopread(tcofn, hd, tReq)
 
-    return iono
+    return hd
+
+
+def iter_tra(path: Path, chunk: int = 100) -> "TraChunks":
+    """
+    iterate over binary "transcar_output" file, yielding Datasets of up to chunk consecutive time steps,
+    so that reductions can run over files larger than memory.
+
+    Parameters
+    ----------
+    path: path above dir.output/transcar_output
+    chunk: number of time steps per Dataset
+
+    Returns
+    -------
+    TraChunks: iterable, with attribute "remaining" giving the number of time steps not yet read
+    """
+    tcofn = path / "dir.output/transcar_output"
+
+    return TraChunks(tcofn, traheader(tcofn), chunk)
+
+
+class TraChunks:
+    """
+    iterator over transcar_output records, "chunk" at a time, reusing one read buffer.
+
+    len() is the number of chunks left, .remaining the number of time steps left.
+    """
 
+    def __init__(self, tcofn: Path, hd: dict, chunk: int):
+        if chunk < 1:
+            raise ValueError("chunk must be >= 1")
 
-def loopread(tcofn: Path, hd: dict, tReq: datetime = None) -> xarray.DataArray:
+        self.tcofn = Path(tcofn).expanduser()
+        self.hd = hd
+        self.chunk = chunk
+        self.n_t = self.tcofn.stat().st_size // hd["size_record"] // d_bytes
+        self.remaining = self.n_t
+
+    def __len__(self) -> int:
+        return -(-self.remaining // self.chunk)
+
+    def __iter__(self) -> Iterator[xarray.Dataset]:
+        buf = np.empty((min(self.chunk, self.remaining), self.hd["size_record"]), np.float32)
+
+        with self.tcofn.open("rb") as f:
+            f.seek((self.n_t - self.remaining) * buf[0].nbytes)
+            while self.remaining > 0:
+                raw = buf[: min(self.chunk, self.remaining)]
+                with span("readrecords") as s:
+                    if f.readinto(raw) != raw.nbytes:  # type: ignore
+                        raise EOFError(f"{self.tcofn} truncated")
+                    s.add(nbytes=raw.nbytes, records=raw.shape[0])
+                self.remaining -= raw.shape[0]
+                # decoderecords copies out of buf, so buf can be refilled
+                yield decoderecords(raw, self.hd, self.tcofn)
+
+
+def loopread(tcofn: Path, hd: dict, tReq: datetime = None, dtype=None) -> xarray.DataArray:
 
     tcoutput = Path(tcofn).expanduser()
     n_t = tcoutput.stat().st_size // hd["size_record"] // d_bytes
@@ -115,9 +187,10 @@ def loopread(tcofn: Path, hd: dict, tReq: datetime = None) -> xarray.DataArray:
     iono: xarray.DataArray = []
     with tcoutput.open("rb") as f:  # reset to beginning
         for _ in range(n_t):
-            iono.append(data_tra(f, hd))
+            iono.append(data_tra(f, hd, dtype))
 
-    iono = xarray.concat(iono, "time")
+    with span("concat"):
+        iono = xarray.concat(iono, "time")
     # %% handle time request -- will return Dataframe if tReq, else returns Panel of all times
     if tReq is not None:  # have to qualify this since picktime default gives last time as fallback
         tUsedInd = picktime(iono.time.values, tReq)[0]
@@ -127,28 +200,169 @@ def loopread(tcofn: Path, hd: dict, tReq: datetime = None) -> xarray.DataArray:
     return iono
 
 
-def data_tra(f: IO[Any], hd: dict) -> xarray.DataArray:
-    # %% parse header
-    h = np.fromfile(f, np.float32, nhead)
-    head = parseionoheader(h)
-    # %% read and index data
-    data = np.fromfile(f, np.float32, hd["size_data_record"]).reshape((hd["nx"], hd["ncol"]), order="C")
+def seekread(tcofn: Path, hd: dict, tReq, index: bool = False, dtype=None) -> xarray.Dataset:
+    """
+    reads only the records of transcar_output needed for tReq,
+    located by a header-only scan of the fixed-size records.
+    See read_tra for the forms of tReq.
+    index: save the header scan next to the file for later calls
+    dtype: precision of iono and pp, see read_tra
+    """
+    tcoutput = Path(tcofn).expanduser()
+
+    with span("recordtimes"):
+        ind = timeindex(recordtimes(tcoutput, hd, index), tReq)
+
+    with tcoutput.open("rb") as f:
+        raw = readrecords(f, hd, np.atleast_1d(ind))
+
+    iono = decoderecords(raw, hd, tcoutput, dtype)
+    if np.ndim(ind) == 0:
+        iono = iono.isel(time=0)
+
+    return iono
+
+
+def recordtimes(tcofn: Path, hd: dict, persist: bool = False) -> np.ndarray:
+    """
+    time of each record of transcar_output, from the record headers only.
+    persist: save the header index next to the file, so later calls don't rescan it (see read_index)
+    """
+    index = read_index(tcofn, persist)
+    assert (index["nx"] == hd["nx"]).all(), "number of altitudes changes between records"
+
+    return index["time"]
 
-    dextind = tuple(range(1, 7)) + (49,) + tuple(range(7, 13))
-    if head["approx"] >= 13:
-        dextind += tuple(range(13, 22))
-    else:
-        dextind += (12, 13, 13, 14, 14, 15, 15, 16, 16)
-    # n7=49 if ncol>49 else None
 
-    iono = xarray.DataArray(data[:, dextind], coords=[("alt_km", data[:, 0]), ("isrparam", PARAM)], attrs={"filename": f.name})
+def timeindex(t: np.ndarray, tReq) -> Union[int, np.ndarray]:
+    """
+    record indices for tReq, by binary search over the (sorted) record times t.
+    See read_tra for the forms of tReq.
+    """
+    if isinstance(tReq, tuple):
+        tstart, tend = tReq
+        i0 = 0 if tstart is None else np.searchsorted(t, np.datetime64(tstart), "left")
+        i1 = t.size if tend is None else np.searchsorted(t, np.datetime64(tend), "right")
+        if i0 >= i1:
+            raise ValueError(f"no records between {tstart} and {tend}")
+        return np.arange(i0, i1)
+
+    if isinstance(tReq, (list, np.ndarray)):
+        treq = np.array([np.datetime64(r) for r in tReq])
+        if t.size == 1:
+            return np.zeros(treq.size, int)
+        i = np.searchsorted(t, treq).clip(1, t.size - 1)
+        # nearest of the two neighbors
+        return np.where(abs(t[i - 1] - treq) <= abs(t[i] - treq), i - 1, i)
+
+    return picktime(t, tReq)[0]
+
+
+def readrecords(f: IO[Any], hd: dict, ind: np.ndarray) -> np.ndarray:
+    """read the transcar_output records ind into a (ind.size, size_record) array, seeking past the others"""
+    nbytes = hd["size_record"] * d_bytes
+
+    with span("readrecords") as s:
+        s.add(nbytes=ind.size * nbytes, records=ind.size)
+
+        if ind.size > 1 and (np.diff(ind) == 1).all():  # contiguous, one read
+            f.seek(ind[0] * nbytes)
+            return np.fromfile(f, np.float32, ind.size * hd["size_record"]).reshape((ind.size, hd["size_record"]))
+
+        raw = np.empty((ind.size, hd["size_record"]), np.float32)
+        for j, i in enumerate(ind):
+            f.seek(i * nbytes)
+            raw[j] = np.fromfile(f, np.float32, hd["size_record"])
+
+    return raw
+
+
+def mmapread(tcofn: Path, hd: dict, tReq: datetime = None, dtype=None) -> xarray.Dataset:
+    """
+    reads every record of transcar_output in one pass from a (n_t, size_record) memory map.
+    Headers are decoded together and data columns indexed for all times at once,
+    so no per-record Dataset or xarray.concat is needed.
+    """
+    tcoutput = Path(tcofn).expanduser()
+    n_t = tcoutput.stat().st_size // hd["size_record"] // d_bytes
+
+    raw = np.memmap(tcoutput, np.float32, "r", shape=(n_t, hd["size_record"]))
+    with span("mmapread") as s:  # pages are read as decoding touches them
+        iono = decoderecords(raw, hd, tcoutput, dtype)
+        s.add(nbytes=raw.nbytes, records=n_t)
+    del raw  # data were copied by fancy indexing, release the map
+    # %% handle time request
+    if tReq is not None:
+        tUsedInd = picktime(iono.time.values, tReq)[0]
+        if tUsedInd is not None:
+            iono = iono.isel(time=tUsedInd)
+
+    return iono
+
+
+def decoderecords(raw: np.ndarray, hd: dict, fn: Path, dtype=None) -> xarray.Dataset:
+    """
+    decode a 2-D (n_records, size_record) block of transcar_output records
+
+    Parameters
+    ----------
+
+    raw: numpy.ndarray
+        float32 records, each a header followed by nx * ncol data values
+    hd: dict
+        header of the first record, from read_tra
+    fn: pathlib.Path
+        filename, for attrs
+    dtype: optional
+        precision of iono and pp, default float32 iono and float64 pp
+    """
+    with span("decode") as s:
+        head, bad = parseionoheaders(raw[:, :nhead])
+        if bad.size:
+            raise ValueError(f"{fn}: bad record headers at indices {bad}")
+
+        approx = head["approx"]
+        if (approx != approx[0]).any():
+            raise ValueError(f"{fn}: approx changes between records, use loopread()")
+
+        data = raw[:, nhead:].reshape((raw.shape[0], hd["nx"], hd["ncol"]), order="C")
+
+        lay = layout("tra", approx[0], hd["ncol"])
+        iono = xarray.DataArray(
+            lay.take(data).astype(dtype or data.dtype, copy=False),
+            coords=[("time", head["htime"]), ("alt_km", data[0, :, 0].copy()), ("isrparam", list(lay.names))],
+            attrs={"filename": str(fn)},
+        )
+        s.add(records=raw.shape[0])
+
+    pp = compplasmaparam(iono, approx[0], dtype=dtype)
+
+    return xarray.Dataset({"iono": iono, "pp": pp}, attrs={"chi": head["chi"][0]})
+
+
+def data_tra(f: IO[Any], hd: dict, dtype=None) -> xarray.DataArray:
+    with span("readrecords") as s:
+        h = np.fromfile(f, np.float32, nhead)
+        data = np.fromfile(f, np.float32, hd["size_data_record"]).reshape((hd["nx"], hd["ncol"]), order="C")
+        s.add(nbytes=h.nbytes + data.nbytes, records=1)
+    # %% parse header, index data
+    with span("decode") as s:
+        head = parseionoheader(h)
+
+        lay = layout("tra", head["approx"], hd["ncol"])
+        iono = xarray.DataArray(
+            lay.take(data).astype(dtype or data.dtype, copy=False),
+            coords=[("alt_km", data[:, 0]), ("isrparam", list(lay.names))],
+            attrs={"filename": f.name},
+        )
+        s.add(records=1)
     # %% four ISR parameters
     """
     ion velocity from read_fluidmod.m
     data_tra.m does not consider n7 for ne or vi computation,
     BUT read_fluidmod.m does consider n7!
     """
-    pp = compplasmaparam(iono, head["approx"])
+    pp = compplasmaparam(iono, head["approx"], dtype=dtype)
     # %% output
     iono = xarray.Dataset({"iono": iono, "pp": pp}, coords={"time": head["htime"]}, attrs={"chi": head["chi"]})
 
@@ -156,19 +370,25 @@ def data_tra(f: IO[Any], hd: dict) -> xarray.DataArray:
 
 
 # %% read iono
-def readmsis(ifn: Path, ofn: Path = None, dz=None, newaltmethod: str = None):
-    """reads MSIS model output that Transcar uses"""
+def readmsis(ifn: Path, ofn: Path = None, dz=None, newaltmethod: str = None, n: int = None, dtype=None):
+    """
+    reads MSIS model output that Transcar uses, optionally interpolated to new grid (see newaltgrid)
+
+    dtype: precision of msis and pp, default float32 msis as in the file and float64 pp
+    """
 
     nhead = headbytes // d_bytes
 
     hd, hdraw = readionoheader(ifn, nhead)
 
     msis, raw = readinitconddat(hd, ifn)  # index is altitude (km)
-    pp = compplasmaparam(msis, hd["approx"])
+    msis = msis.astype(dtype or msis.dtype, copy=False)
+    pp = compplasmaparam(msis, hd["approx"], dtype=dtype)
 
     iono = xarray.Dataset({"msis": msis, "pp": pp}, attrs={"hd": hd})
 
-    msisint, rawinterp = interpdat(iono, dz, raw, newaltmethod)
+    z_new = newaltgrid(msis.alt_km.values, dz, newaltmethod, n)
+    msisint, rawinterp = interpdat(iono, None, raw, z_new=z_new, dtype=dtype)
 
     writeinterpunformat(msisint.attrs["hd"]["nx"], rawinterp, hdraw, ofn)
 
@@ -186,62 +406,99 @@ def getaltgrid(ifn: Path) -> xarray.DataArray:
     return msis.alt_km
 
 
-def interpdat(md: xarray.DataArray, dz, raw: np.ndarray, newaltmethod: str = None) -> tuple:
-    """interpolate data to new altitude grid"""
-    # %% was interpolation requested?
-    if dz is None or newaltmethod is None:
-        return md, raw
-    # %% interpolate initial conditions
+def newaltgrid(z: np.ndarray, dz, newaltmethod: str = None, n: int = None) -> Union[np.ndarray, None]:
+    """
+    new altitude grid spanning z, or None if no interpolation was requested
+
+    Parameters
+    ----------
+
+    z: numpy.ndarray
+        original altitude grid [km]
+    dz: list of float
+        grid spacing [km], see newaltmethod
+    newaltmethod: str
+        linear: constant spacing dz[0]
+        incr: spacing starting at dz[0], increasing by dz[0] each step
+        tanh: tanh grid from minimum to maximum spacing dz[0], dz[1]
+    n: int, optional
+        number of points: the last spacing is solved so the grid spans z in exactly n points (see grid.altgrid).
+        tanh default is number of points of z.
+    """
+    if newaltmethod is None or (dz is None and n is None):
+        return None
+
+    dz = tuple(float(d) for d in np.atleast_1d(dz if dz is not None else []))
     malt = newaltmethod.lower()
-    if malt == "tanh":
-        z_new = setupz(md.shape[0], md.index[0], dz[0], dz[1])
-    elif malt == "linear":
-        print(f"interpolating to grid space {dz:.2f} km.")
-        z_new = np.arange(md.index[0], md.index[-1], dz[0], dtype=float)
-    elif malt == "incr":
-        """
-        in this case, dz is start spacing and  amount to increase step size for each element
-        The method used to implement this is inefficient, but it is a very small dataset.
-        """
-        z_new = [md.index[0]]
-        cdz = dz[0]
-        while (z_new[-1] + cdz) < md.index[-1]:
-            z_new.append(z_new[-1] + cdz)
-            cdz += dz[0]
-        z_new = np.asarray(z_new)
-    else:
-        logging.error(f"unknown interp method {newaltmethod}, returning unaltered values.")
-        return md, raw
+    if malt == "tanh" and n is None:
+        n = z.size
+    elif malt == "linear" and dz:
+        print(f"interpolating to grid space {dz[0]:.2f} km.")
+
+    try:
+        z_new = altgrid(float(z[0]), float(z[-1]), malt, dz, n)
+    except ValueError as e:
+        logging.error(f"{e}, returning unaltered values.")
+        return None
 
     if z_new.size > toobig:
         logging.warning(f"Transcar may not accept altitude grids with more than about {toobig} elements.")
 
-    # %% assemble output
-    mint = xarray.DataArray(
-        np.empty((z_new.size, md.shape[1])),
-        dims=["alt_km", "isrparam"],
-        coords={"alt_km": z_new, "isrparam": md.coords["isrparam"]},
-    )  # this is faster than list(md)
-    for m in md:
-        fint = interp1d(md.index, md[m], kind="linear", axis=0)
-        mint.loc[:, m] = fint(z_new)
+    return z_new
+
+
+def interpdat(
+    md: xarray.Dataset,
+    dz,
+    raw: np.ndarray,
+    newaltmethod: str = None,
+    z_new: np.ndarray = None,
+    op: AltInterp = None,
+    dtype=None,
+) -> tuple:
+    """
+    interpolate data to new altitude grid.
+    All columns of raw are interpolated in one operation, msis is taken from the interpolated columns
+    and pp computed from it.
+
+    Parameters
+    ----------
+
+    md: xarray.Dataset
+        msis and pp on original grid, header as attribute hd
+    dz, newaltmethod:
+        new grid specification, see newaltgrid
+    raw: numpy.ndarray
+        (nx, ncol) all columns of initial conditions file
+    z_new: numpy.ndarray, optional
+        precomputed new altitude grid, instead of dz, newaltmethod
+    op: transcarread.interp.AltInterp, optional
+        precomputed interpolation from the grid of md, reusable for all files on that grid
+    dtype: optional
+        precision of interpolation and outputs, default float64
+    """
+    z = md.alt_km.values
+    if op is None:
+        if z_new is None:
+            z_new = newaltgrid(z, dz, newaltmethod)
+        # %% was interpolation requested?
+        if z_new is None:
+            return md, raw
+        op = AltInterp(z, z_new)
+
+    if np.isnan(op.weight).any():
+        raise ValueError(f"new altitude grid exceeds {z[0]:.1f} .. {z[-1]:.1f} km")
     # %% new header, only change to number of altitudes
-    hdint = md.attrs["hd"]
-    hdint["nx"] = z_new.size
+    hdint = dict(md.attrs["hd"])
+    hdint["nx"] = op.dst.size
     # %% raw data, we'll write this to disk later
-    fint = interp1d(md.index, raw, kind="linear", axis=0)
-    rawint = fint(z_new)
-    # %% interpolate derived parameters
-    ppint = xarray.DataArray(
-        np.empty((z_new.size, md["pp"].shape[1])),
-        dims=["alt_km", "isrparam"],
-        coords={"alt_km": z_new, "isrparam": md.coords["isrparam"]},
-    )
-    for p in md["pp"]:
-        fint = interp1d(md["pp"].alt_km, md["pp"].loc[:, p], kind="linear", axis=0)
-        ppint.loc[:, p] = fint(z_new)
+    rawint = op(raw, dtype)
+    rawint[:, 0] = op.dst
+    # %% derived parameters on new grid
+    mint = initcondarray(hdint, rawint, md["msis"].attrs.get("filename"))
+    ppint = compplasmaparam(mint, hdint["approx"], dtype=dtype)
 
-    iono = xarray.Dataset({"md": mint, "pp": ppint}, attrs={"hd": hdint})
+    iono = xarray.Dataset({"msis": mint, "pp": ppint}, attrs={"hd": hdint})
 
     return iono, rawint
 
@@ -257,9 +514,16 @@ def writeinterpunformat(nx: int, rawi, hdraw, ofn: Path = None):
     hdraw[0] = nx
 
     print("writing", ofn)
-    with ofn.open("wb") as f:
-        hdraw.tofile(f, "", "%f32")
-        rawi.astype(np.float32).tofile(f, "", "%f32")
+    # written beside ofn then renamed, so ofn is never partially written
+    tmp = ofn.with_name(f".{ofn.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            hdraw.tofile(f, "", "%f32")
+            rawi.astype(np.float32).tofile(f, "", "%f32")
+        os.replace(tmp, ofn)
+    finally:
+        if tmp.is_file():
+            tmp.unlink()
 
 
 def readinitconddat(hd: dict, fn: Path) -> Tuple[xarray.DataArray, np.ndarray]:
@@ -268,76 +532,30 @@ def readinitconddat(hd: dict, fn: Path) -> Tuple[xarray.DataArray, np.ndarray]:
     nx = hd["nx"]
     ncol = hd["ncol"]
 
-    # *** these indices correspond exactly to the columns of msis!! ****
-    # from transconvec_13.op.f lines 452 - 542
-    if hd["approx"].astype(int) == 13:
-        dextind = tuple(range(1, 34))
-    else:
-        dextind = tuple(range(1, 13)) + (12, 13, 13, 14, 14, 15, 15, 16, 16) + tuple(range(17, 29))
-
-    if ncol > 60:
-        dextind += (60, 61, 62)
-
-    dextind += (49,)  # as in output
-
     with fn.open("rb") as f:  # python2 requires r first
         ipos = 2 * ncol * d_bytes
         f.seek(ipos, 0)
         rawall = np.fromfile(f, np.float32, nx * ncol).reshape((nx, ncol), order="C")  # yes order='C'!
 
+    return initcondarray(hd, rawall, fn), rawall
+
+
+def initcondarray(hd: dict, rawall: np.ndarray, fn: Path = None) -> xarray.DataArray:
+    """msis parameters from all (nx, ncol) columns of initial conditions, altitude in column 0"""
+    lay = layout("initcond", hd["approx"], hd["ncol"])
+
     msis = xarray.DataArray(
-        rawall[:, dextind],
+        lay.take(rawall),
         dims=["alt_km", "isrparam"],
-        coords={
-            "alt_km": rawall[:, 0],
-            "isrparam": [
-                "n1",
-                "n2",
-                "n3",
-                "n4",
-                "n5",
-                "n6",
-                "v1",
-                "v2",
-                "v3",
-                "vm",
-                "ve",
-                "t1p",
-                "t1t",
-                "t2p",
-                "t2t",
-                "t3p",
-                "t3t",
-                "tmp",
-                "tmt",
-                "tep",
-                "tet",
-                "q1",
-                "q2",
-                "q3",
-                "qe",
-                "nno",
-                "uno",
-                "po",
-                "ph",
-                "pn",
-                "pn2",
-                "po2",
-                "heat",
-                "po1d",
-                "no1d",
-                "uo1d",
-                "n7",
-            ],
-        },
+        coords={"alt_km": rawall[:, 0], "isrparam": list(lay.names)},
         attrs={"filename": fn},
     )
 
-    return msis, rawall
+    return msis
 
 
 # %% read transcar
-def calcVERtc(datadir: Path, tReq: datetime, config_fn: Path):
+def calcVERtc(datadir: Path, tReq: datetime, config_fn: Path, cache: Union[bool, Path] = False):
     """
     calcVERtc is the function called by "hist-feasibility" to get Transcar modeled VER/flux
 
@@ -358,6 +576,8 @@ def calcVERtc(datadir: Path, tReq: datetime, config_fn: Path):
     Tested with:
     Matplotlib 1.4 (1.3.1 does NOT work for pcolormesh)
 
+    cache: passed to ExcitationRates
+
     Plambda contains all the wavelengths generated for the reactions at a particular beam energy level
     Plambda row: wavelength col: altitude
     for each energy bin, we take Plambda through the EMCCD window and optional BG3 filter,
@@ -377,7 +597,7 @@ def calcVERtc(datadir: Path, tReq: datetime, config_fn: Path):
             tReq = tctime["tendPrecip"]
             logging.warning(f"falling back to using the end simulation time: {tReq}")
     # %% convert transcar output
-    rates = ExcitationRates(beamdir / KINFN)
+    rates = ExcitationRates(beamdir / KINFN, cache)
 
     tReqInd, tUsed = picktime(rates.time.values, tReq)
 
@@ -386,6 +606,11 @@ def calcVERtc(datadir: Path, tReq: datetime, config_fn: Path):
     return rates
 
 
+def _readername(reader: str, dtype) -> str:
+    """cache key reader name, distinct per dtype"""
+    return reader if dtype is None else f"{reader}_{np.dtype(dtype).name}"
+
+
 def picktime(tTC, tReq):
 
     if tReq is None:
@@ -444,39 +669,40 @@ class SimpleSim:
 # %% ISR
 
 
-def compplasmaparam(iono: xarray.DataArray, approx: int) -> xarray.DataArray:
-    assert isinstance(iono, xarray.DataArray)
-
-    pp = xarray.DataArray(
-        np.empty((iono.shape[0], 4)),
-        coords=[("alt_km", iono.alt_km), ("isrparam", ["ne", "vi", "Ti", "Te"])],
-        attrs={"filename": iono.attrs["filename"]},
-    )
+def compplasmaparam(iono: xarray.DataArray, approx: int, out: np.ndarray = None, dtype=None) -> xarray.DataArray:
+    """
+    ISR parameters ne, vi, Ti, Te for (..., isrparam) ionosphere state, e.g. (time, alt_km, isrparam)
 
-    nm = iono.loc[:, ["n4", "n5", "n6"]].sum(dim="isrparam")
+    out: optional preallocated (..., 4) buffer
+    dtype: optional output and arithmetic precision, default float64. float32 input with dtype float32 is not copied.
+    """
+    assert isinstance(iono, xarray.DataArray)
 
-    pp.loc[:, "ne"] = comp_ne(iono)
-    #    pp.sel(isrparam='ne') = comp_ne(iono) # doesn't work for assign?
-    pp.loc[:, "vi"] = comp_vi(iono, nm, pp)
-    pp.loc[:, "Ti"] = comp_Ti(iono, nm, pp)
-    pp.loc[:, "Te"] = comp_Te(iono, approx)
+    dims = iono.dims[:-1]  # (time,) alt_km
+    with span("plasmaparam") as s:
+        pp = xarray.DataArray(
+            plasmaparam(iono.values, iono.isrparam.values, approx, out=out, dtype=dtype),
+            coords=[(d, iono[d].values) for d in dims] + [("isrparam", ISRPARAM)],
+            attrs={"filename": iono.attrs["filename"]},
+        )
+        s.add(records=iono.shape[0] if iono.ndim == 3 else 1)
 
     return pp
 
 
 def comp_ne(d: xarray.DataArray) -> xarray.DataArray:
     """compute electron density vs. altitude"""
-    return d.loc[:, ["n1", "n2", "n3", "n4", "n5", "n6", "n7"]].sum("isrparam")
+    return d.loc[..., ["n1", "n2", "n3", "n4", "n5", "n6", "n7"]].sum("isrparam")
 
 
 def comp_vi(d: xarray.DataArray, nm: xarray.DataArray, pp: xarray.DataArray) -> xarray.DataArray:
     """compute ion velocity vs. altitude"""
     return (
-        d.loc[:, ["n1", "v1"]].prod("isrparam")
-        + d.loc[:, ["n2", "v2"]].prod("isrparam")
-        + d.loc[:, ["n3", "v3"]].prod("isrparam")
-        + nm * d.loc[:, "vm"]
-    ) / pp.loc[:, "ne"]
+        d.loc[..., ["n1", "v1"]].prod("isrparam")
+        + d.loc[..., ["n2", "v2"]].prod("isrparam")
+        + d.loc[..., ["n3", "v3"]].prod("isrparam")
+        + nm * d.loc[..., "vm"]
+    ) / pp.loc[..., "ne"]
 
 
 def comp_Ti(d: xarray.DataArray, nm: xarray.DataArray, pp: xarray.DataArray) -> xarray.DataArray:
@@ -486,18 +712,18 @@ def comp_Ti(d: xarray.DataArray, nm: xarray.DataArray, pp: xarray.DataArray) ->
     """
 
     Tipar = (
-        d.loc[:, ["n1", "t1p"]].prod("isrparam")
-        + d.loc[:, ["n2", "t2p"]].prod("isrparam")
-        + d.loc[:, ["n3", "t3p"]].prod("isrparam")
-        + nm * d.loc[:, "tmp"]
-    ) / pp.loc[:, "ne"]
+        d.loc[..., ["n1", "t1p"]].prod("isrparam")
+        + d.loc[..., ["n2", "t2p"]].prod("isrparam")
+        + d.loc[..., ["n3", "t3p"]].prod("isrparam")
+        + nm * d.loc[..., "tmp"]
+    ) / pp.loc[..., "ne"]
 
     Tiperp = (
-        d.loc[:, ["n1", "t1t"]].prod("isrparam")
-        + d.loc[:, ["n2", "t2t"]].prod("isrparam")
-        + d.loc[:, ["n3", "t3t"]].prod("isrparam")
-        + nm * d.loc[:, "tmt"]
-    ) / pp.loc[:, "ne"]
+        d.loc[..., ["n1", "t1t"]].prod("isrparam")
+        + d.loc[..., ["n2", "t2t"]].prod("isrparam")
+        + d.loc[..., ["n3", "t3t"]].prod("isrparam")
+        + nm * d.loc[..., "tmt"]
+    ) / pp.loc[..., "ne"]
     # return (n1*t1 + n2*t2 + n3*t3 +nm*tm)/(n1 +n2 +n3 +nm)
     Ti = (1 / 3) * Tipar + (2 / 3) * Tiperp
 
@@ -506,9 +732,9 @@ def comp_Ti(d: xarray.DataArray, nm: xarray.DataArray, pp: xarray.DataArray) ->
 
 def comp_Te(d: xarray.DataArray, approx: int) -> xarray.DataArray:
     if int(approx) == 13:
-        Te = (d.loc[:, "tep"] + 2 * d.loc[:, "tet"]).astype(float) / 3.0
+        Te = (d.loc[..., "tep"] + 2 * d.loc[..., "tet"]).astype(float) / 3.0
     else:
-        Te = d.loc[:, "tep"].astype(float)
+        Te = d.loc[..., "tep"].astype(float)
 
     return Te
 
@@ -516,12 +742,15 @@ def comp_Te(d: xarray.DataArray, approx: int) -> xarray.DataArray:
 # %%
 
 
-def ExcitationRates(kinfn: Path) -> xarray.DataArray:
+def ExcitationRates(kinfn: Path, cache: Union[bool, Path] = False, dtype=None) -> xarray.DataArray:
     """
     Michael Hirsch 2014
     Parses the ASCII dir.output/emissions.dat in milliseconds
     based on transconvec_13
 
+    cache: keep the parsed file in an on-disk cache (True: "dir.cache" next to "dir.output", or cache directory path)
+    dtype: precision of parsed values, default float64. numpy.float32 halves memory.
+
     outputs:
     excrate: xarray.DataArray of reaction x altitude x time
 
@@ -537,7 +766,10 @@ def ExcitationRates(kinfn: Path) -> xarray.DataArray:
     NdataCol: number of data elements per altitude + 1
     NumData: number of data elements to read at this time step
     """
-    rates = readexcrates(kinfn)
+    if cache:
+        rates = cached(kinfn, _readername("readexcrates", dtype), lambda: readexcrates(kinfn, dtype), cache)
+    else:
+        rates = readexcrates(kinfn, dtype)
     # breakup slightly to meet needs of simpler external programs
     # z = excite.major_axis.values
     return rates["excitation"]
@@ -553,53 +785,53 @@ def initparams(kinfn: Path) -> Tuple[Path, int, int, float, datetime, int, int,
 
     Nprecip = NprecipCol * nen  # how many precip elements to read at this time step
     ndat = NdataCol * nalt  # how many elements to read at this time step
-    # how many rows of data (less header) to read in a batch
-    ndatrow = (ndat + Nprecip) // NumPerRow + 1
+    # how many rows of data (less header) per time step:
+    # data and precip are written separately, each starting on a new line of NumPerRow values
+    ndatrow = -(-ndat // NumPerRow) + -(-Nprecip // NumPerRow)
 
     logging.debug(f"{kinfn} {ctime} Nalt: {nalt} nen: {nen} dipangle[deg]: {dip:.2f}")
 
     return kinfn, nalt, nen, dip, ctime, ndatrow, ndat, Nprecip
 
 
-def readexcrates(kinfn: Path) -> xarray.Dataset:
-
-    kinfn, nalt, nen, dipangle, ctime, ndatrow, ndat, Nprecip = initparams(kinfn)
-    # using read_csv was vastly slower!
-
-    with kinfn.open("r") as f:
-        dstream = np.asarray(f.read().split()).astype(float)
-    # print(time()-tic)
-    nhead = NumPerRow
-    size_record = ndat + Nprecip + nhead
-    n_t = dstream.size // size_record
-
-    t = np.empty(n_t, datetime)
-    excrate = xarray.DataArray(np.empty((n_t, nalt, 10)), dims=["time", "alt_km", "reaction"])
-    excrate["reaction"] = ["no1d", "no1s", "noii2p", "nn2a3", "po3p3p", "po3p5p", "p1ng", "pmein", "p2pg", "p1pg"]
-
-    precip = xarray.DataArray(data=np.empty((n_t, nen, NprecipCol)), dims=["time", "e", "fluxdown"])
-
-    for i in range(n_t):
-        cind = np.s_[i * size_record: (i + 1) * size_record]
-        crec = dstream[cind]
+def readexcrates(kinfn: Path, dtype=None) -> xarray.Dataset:
+    """
+    excitation rates and precipitation of every time step of ASCII dir.output/emissions.dat.
+    Both are views of one buffer of dtype (default float64) that the file is parsed into.
+    """
 
-        # h = crec[:nhead] #unused
-        d = crec[nhead:-Nprecip].reshape((nalt, NdataCol), order="C")
-        # blank nan are between data and precip
-        p = crec[-Nprecip:].reshape((nen, NprecipCol), order="C")
+    with span("readexcrates"):
+        kinfn, nalt, nen, dipangle, ctime, ndatrow, ndat, Nprecip = initparams(kinfn)
+        # using read_csv was vastly slower!
+        nhead = NumPerRow
+        size_record = ndat + Nprecip + nhead
 
-        t[i] = parseheadtime(crec[:2])
+        dstream = reademissions(kinfn, size_record, ndatrow + 1, dtype=dtype)
 
-        excrate[i, ...] = d[:, 1:]
+        n_t = dstream.size // size_record
+        # %% split every time step at once, these are views of dstream
+        with span("decode") as s:
+            recs = dstream.reshape((n_t, size_record))
 
-        precip[i, ...] = p
+            t = parseheadtimes(recs[:, :nhead])
+            d = recs[:, nhead:-Nprecip].reshape((n_t, nalt, NdataCol), order="C")
+            # blank nan are between data and precip
+            p = recs[:, -Nprecip:].reshape((n_t, nen, NprecipCol), order="C")
 
-    excrate["alt_km"] = d[:, 0]
-    excrate["time"] = t
+            excrate = xarray.DataArray(
+                d[..., 1:],
+                coords={
+                    "time": t,
+                    "alt_km": d[-1, :, 0],
+                    "reaction": REACTION,
+                },
+                dims=["time", "alt_km", "reaction"],
+            )
 
-    precip["time"] = t
+            precip = xarray.DataArray(p, coords={"time": t}, dims=["time", "e", "fluxdown"])
 
-    rates = xarray.Dataset({"excitation": excrate, "precip": precip})
+            rates = xarray.Dataset({"excitation": excrate, "precip": precip})
+            s.add(records=n_t)
 
     return rates
 
@@ -625,3 +857,17 @@ def getHeader(line: str) -> Tuple[datetime, float, int, int]:
 
 def parseheadtime(h: np.ndarray) -> datetime:
     return datetime.strptime(str(int(h[0])), "%Y%j") + timedelta(seconds=float(h[1]))
+
+
+def parseheadtimes(h: np.ndarray) -> np.ndarray:
+    """
+    vectorized parseheadtime over a 2-D (n_t, nhead) array of emissions.dat headers
+
+    h[:, 0]: Year, day of year YYYYDDD
+    h[:, 1]: second of day from midnight UTC
+    """
+    yd = h[:, 0].astype(np.int64)
+
+    t = (yd // 1000 - 1970).astype("datetime64[Y]").astype("datetime64[D]") + (yd % 1000 - 1).astype("timedelta64[D]")
+
+    return t + np.round(h[:, 1].astype(np.float64) * 1e6).astype("timedelta64[us]")  # not in the parsed dtype
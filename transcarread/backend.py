@@ -0,0 +1,246 @@
+"""
+xarray backend, so that Transcar files open lazily with
+
+    xarray.open_dataset(path, engine="transcar")
+
+transcar_output and emissions.dat are indexed at open (headers / line counts only),
+and data are read record by record on access, so chunks={"time": N} with dask
+loads only the records of each chunk.
+The MSIS initial conditions .dat (one record) is read at open.
+
+transcar_output gives variables
+  iono (time, alt_km, isrparam), pp (time, alt_km, ppparam), chi (time)
+emissions.dat gives
+  excitation (time, alt_km, reaction), precip (time, e, fluxdown)
+initial conditions .dat gives
+  msis (alt_km, isrparam), pp (alt_km, ppparam)
+"""
+from pathlib import Path
+from typing import Dict, Tuple, Any
+import numpy as np
+import xarray
+from xarray.backends import BackendEntrypoint, BackendArray
+from xarray.core import indexing
+
+from . import (
+    PARAM,
+    ISRPARAM,
+    REACTION,
+    KINFN,
+    NumPerRow,
+    NprecipCol,
+    NdataCol,
+    headbytes,
+    d_bytes,
+    nhead,
+    traheader,
+    readrecords,
+    read_index,
+    initparams,
+    parseheadtimes,
+    readionoheader,
+    parseionoheaders,
+    readinitconddat,
+    compplasmaparam,
+    plasmaparam,
+    layout,
+)
+from .io import emissions_offsets
+
+
+def filekind(fn: Path) -> str:
+    """ "tra", "emissions", "initcond" or "" for file types this backend reads"""
+    fn = Path(fn)
+    if fn.name.startswith("transcar_output") and not fn.name.endswith(".npz"):
+        return "tra"
+    if fn.name == Path(KINFN).name:
+        return "emissions"
+    if fn.suffix == ".dat" and _initcond_header(fn):
+        return "initcond"
+
+    return ""
+
+
+def _initcond_header(fn: Path) -> bool:
+    """whether fn begins with an initial conditions header: whole nx and ncol of a known layout, a valid date"""
+    try:
+        size = fn.stat().st_size
+        if size < headbytes:
+            return False
+        h = np.fromfile(fn, np.float32, headbytes // d_bytes)
+    except OSError:
+        return False
+
+    nx, ncol = h[:2]
+    if not (2 <= nx <= 10000 and 50 <= ncol <= 1000 and nx == int(nx) and ncol == int(ncol)):
+        return False
+    if size < headbytes + int(nx) * int(ncol) * d_bytes:
+        return False
+
+    return parseionoheaders(h[None, :37])[1].size == 0
+
+
+class TranscarBackendEntrypoint(BackendEntrypoint):
+
+    open_dataset_parameters = ("filename_or_obj", "drop_variables")
+    description = "Open Transcar transcar_output, emissions.dat and initial conditions .dat lazily"
+
+    def open_dataset(self, filename_or_obj, *, drop_variables=None) -> xarray.Dataset:  # type: ignore
+        fn = Path(filename_or_obj).expanduser()
+
+        kind = filekind(fn)
+        if kind == "tra":
+            ds = open_tra(fn)
+        elif kind == "emissions":
+            ds = open_emissions(fn)
+        elif kind == "initcond":
+            ds = open_initcond(fn)
+        else:
+            raise ValueError(f"{fn} is not a Transcar file this backend reads")
+
+        if drop_variables:
+            ds = ds.drop_vars(drop_variables)
+
+        return ds
+
+    def guess_can_open(self, filename_or_obj) -> bool:
+        try:
+            return bool(filekind(filename_or_obj))
+        except TypeError:
+            return False
+
+
+class TraArray(BackendArray):
+    """iono or pp of transcar_output, reading only the records indexed"""
+
+    def __init__(self, tcofn: Path, hd: dict, n_t: int, pp: bool):
+        self.tcofn = tcofn
+        self.hd = hd
+        self.pp = pp
+        self.shape = (n_t, hd["nx"], len(ISRPARAM) if pp else len(PARAM))
+        self.dtype = np.dtype(np.float64 if pp else np.float32)
+
+    def __getitem__(self, key: indexing.ExplicitIndexer) -> np.ndarray:
+        return indexing.explicit_indexing_adapter(key, self.shape, indexing.IndexingSupport.BASIC, self._getitem)
+
+    def _getitem(self, key: Tuple[Any, ...]) -> np.ndarray:
+        ind = np.arange(self.shape[0])[key[0]]
+
+        with self.tcofn.open("rb") as f:
+            raw = readrecords(f, self.hd, np.atleast_1d(ind))
+
+        data = decodetra(raw, self.hd, self.pp)["pp" if self.pp else "iono"]
+        data = data[(slice(None),) + key[1:]]
+
+        return data[0] if np.ndim(ind) == 0 else data
+
+
+class EmissionsArray(BackendArray):
+    """excitation or precip of emissions.dat, parsing only the time steps indexed"""
+
+    def __init__(self, kinfn: Path, offsets: np.ndarray, nalt: int, nen: int, var: str):
+        self.kinfn = kinfn
+        self.offsets = offsets
+        self.nalt = nalt
+        self.nen = nen
+        self.var = var
+        n_t = offsets.size - 1
+        self.shape = (n_t, nalt, NdataCol - 1) if var == "excitation" else (n_t, nen, NprecipCol)
+        self.dtype = np.dtype(np.float64)
+
+    def __getitem__(self, key: indexing.ExplicitIndexer) -> np.ndarray:
+        return indexing.explicit_indexing_adapter(key, self.shape, indexing.IndexingSupport.BASIC, self._getitem)
+
+    def _getitem(self, key: Tuple[Any, ...]) -> np.ndarray:
+        ind = np.arange(self.shape[0])[key[0]]
+
+        data = reademissionsteps(self.kinfn, self.offsets, np.atleast_1d(ind), self.nalt, self.nen)[self.var]
+        data = data[(slice(None),) + key[1:]]
+
+        return data[0] if np.ndim(ind) == 0 else data
+
+
+def decodetra(raw: np.ndarray, hd: dict, pp: bool = True) -> Dict[str, np.ndarray]:
+    """iono and, with pp, pp of (n, size_record) transcar_output records, as the variables of open_tra"""
+    data = raw[:, nhead:].reshape((raw.shape[0], hd["nx"], hd["ncol"]))
+    out = {"iono": layout("tra", hd["approx"], hd["ncol"]).take(data)}
+    if pp:
+        out["pp"] = plasmaparam(out["iono"], PARAM, hd["approx"])
+
+    return out
+
+
+def reademissionsteps(kinfn: Path, offsets: np.ndarray, ind: np.ndarray, nalt: int, nen: int) -> Dict[str, np.ndarray]:
+    """excitation and precip of emissions.dat time steps ind, each time step parsed once"""
+    size_record = NumPerRow + NdataCol * nalt + NprecipCol * nen
+
+    recs = np.empty((ind.size, size_record))
+    with kinfn.open("rb") as f:
+        for j, i in enumerate(ind):
+            f.seek(offsets[i])
+            recs[j] = np.fromstring(f.read(offsets[i + 1] - offsets[i]), sep=" ")
+
+    return {
+        "excitation": recs[:, NumPerRow: NumPerRow + NdataCol * nalt].reshape((ind.size, nalt, NdataCol))[..., 1:],
+        "precip": recs[:, -NprecipCol * nen:].reshape((ind.size, nen, NprecipCol)),
+    }
+
+
+def open_tra(tcofn: Path) -> xarray.Dataset:
+    hd = traheader(tcofn)
+    index = read_index(tcofn, persist=False)
+
+    with tcofn.open("rb") as f:
+        alt_km = readrecords(f, hd, np.array([0]))[0, nhead:].reshape((hd["nx"], hd["ncol"]))[:, 0]
+
+    def lazy(pp: bool) -> indexing.LazilyIndexedArray:
+        return indexing.LazilyIndexedArray(TraArray(tcofn, hd, index.size, pp))
+
+    return xarray.Dataset(
+        {
+            "iono": (("time", "alt_km", "isrparam"), lazy(False)),
+            "pp": (("time", "alt_km", "ppparam"), lazy(True)),
+            "chi": ("time", index["chi"]),
+        },
+        coords={"time": index["time"], "alt_km": alt_km, "isrparam": PARAM, "ppparam": ISRPARAM},
+        attrs={"filename": str(tcofn), "nx": hd["nx"], "ncol": hd["ncol"], "approx": hd["approx"]},
+    )
+
+
+def open_emissions(kinfn: Path) -> xarray.Dataset:
+    kinfn, nalt, nen, dipangle, ctime, ndatrow, ndat, Nprecip = initparams(kinfn)
+
+    offsets = emissions_offsets(kinfn, ndatrow + 1)
+    # header line and altitudes of each time step
+    h = np.empty((offsets.size - 1, NumPerRow))
+    with kinfn.open("rb") as f:
+        for i, o in enumerate(offsets[:-1]):
+            f.seek(o)
+            h[i] = np.fromstring(f.readline(), sep=" ")
+        f.seek(offsets[-2])
+        last = np.fromstring(f.read(offsets[-1] - offsets[-2]), sep=" ")
+
+    alt_km = last[NumPerRow: NumPerRow + ndat].reshape((nalt, NdataCol))[:, 0]
+
+    def lazy(var: str) -> indexing.LazilyIndexedArray:
+        return indexing.LazilyIndexedArray(EmissionsArray(kinfn, offsets, nalt, nen, var))
+
+    return xarray.Dataset(
+        {
+            "excitation": (("time", "alt_km", "reaction"), lazy("excitation")),
+            "precip": (("time", "e", "fluxdown"), lazy("precip")),
+        },
+        coords={"time": parseheadtimes(h), "alt_km": alt_km, "reaction": REACTION},
+        attrs={"filename": str(kinfn), "dipangle": dipangle},
+    )
+
+
+def open_initcond(fn: Path) -> xarray.Dataset:
+    hd = readionoheader(fn, headbytes // d_bytes)[0]
+    msis = readinitconddat(hd, fn)[0]
+    pp = compplasmaparam(msis, hd["approx"])
+
+    return xarray.Dataset(
+        {"msis": msis, "pp": pp.rename(isrparam="ppparam")},
+        attrs={"filename": str(fn), "nx": hd["nx"], "ncol": hd["ncol"], "approx": hd["approx"]},
+    )
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+interpolate and rewrite many MSIS initial conditions files (90kmmaxpt123.dat) to many altitude grids,
+in a process pool.
+
+Each new grid and its interpolation operator are computed once per grid spec and source grid,
+and shared by all files on that source grid.
+Outputs keep the directory layout of the inputs under <outdir>/<spec>/, and are written atomically.
+
+    transcarread-regrid beam*/dir.input/90kmmaxpt123.dat -o regrid -s linear:2 incr:0.1 tanh:1,5 incr:n=250
+"""
+from pathlib import Path
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import List, Dict, Tuple, NamedTuple, Sequence, Optional
+import os
+import numpy as np
+import xarray
+
+from . import (
+    headbytes,
+    d_bytes,
+    readionoheader,
+    readinitconddat,
+    compplasmaparam,
+    newaltgrid,
+    interpdat,
+    writeinterpunformat,
+)
+from .interp import AltInterp
+
+
+class GridSpec(NamedTuple):
+    method: str
+    dz: Tuple[float, ...]
+    n: Optional[int] = None
+
+    @property
+    def label(self) -> str:
+        return "_".join([self.method] + [f"{d:g}" for d in self.dz] + ([f"n{self.n}"] if self.n else []))
+
+    @classmethod
+    def parse(cls, spec: str) -> "GridSpec":
+        """from "method:dz[,dz2][,n=N]" e.g. "linear:2", "tanh:1,5" or number of points "tanh:1,n=200" """
+        method, params = spec.split(":")
+        dz = tuple(float(d) for d in params.split(",") if d and not d.startswith("n="))
+        n = [int(d[2:]) for d in params.split(",") if d.startswith("n=")]
+        return cls(method.lower(), dz, n[0] if n else None)
+
+
+class Job(NamedTuple):
+    ifn: Path
+    ofn: Path
+    spec: GridSpec
+    op: AltInterp
+
+    @property
+    def alt_km(self) -> np.ndarray:
+        return self.op.dst
+
+
+def regrid(ifn: Path, ofn: Path, op: AltInterp) -> Dict[str, float]:
+    """
+    read initial conditions ifn, interpolate to new grid by op and write to ofn
+
+    Returns
+    -------
+
+    timing: dict
+        seconds for read, interp, write
+    """
+    tic = perf_counter()
+    hd, hdraw = readionoheader(ifn, headbytes // d_bytes)
+    msis, raw = readinitconddat(hd, ifn)
+    md = xarray.Dataset({"msis": msis, "pp": compplasmaparam(msis, hd["approx"])}, attrs={"hd": hd})
+    toc = perf_counter()
+
+    iono, rawint = interpdat(md, None, raw, op=op)
+    toc2 = perf_counter()
+
+    ofn.parent.mkdir(parents=True, exist_ok=True)
+    writeinterpunformat(iono.attrs["hd"]["nx"], rawint, hdraw, ofn)
+
+    return {"read": toc - tic, "interp": toc2 - toc, "write": perf_counter() - toc2}
+
+
+def plan(infns: Sequence[Path], specs: Sequence[GridSpec], outdir: Path) -> List[Job]:
+    """
+    one job per input file and grid spec, each new grid and interpolation computed once per spec and source grid
+
+    Parameters
+    ----------
+
+    infns: list of pathlib.Path
+        initial conditions files
+    specs: list of GridSpec
+        new grid specifications
+    outdir: pathlib.Path
+        outputs are written to outdir / spec.label / path of input relative to common parent of inputs
+    """
+    infns = [Path(f).expanduser().resolve() for f in infns]
+    outdir = Path(outdir).expanduser()
+    top = Path(os.path.commonpath([f.parent for f in infns]))
+
+    ops: Dict[tuple, AltInterp] = {}
+    jobs = []
+    for ifn in infns:
+        hd = readionoheader(ifn, headbytes // d_bytes)[0]
+        z = readinitconddat(hd, ifn)[0].alt_km.values
+        for spec in specs:
+            key = (spec, z.tobytes())
+            if key not in ops:
+                z_new = newaltgrid(z, spec.dz, spec.method, spec.n)
+                if z_new is None:
+                    raise ValueError(f"invalid grid {spec}")
+                ops[key] = AltInterp(z, z_new)
+            jobs.append(Job(ifn, outdir / spec.label / ifn.relative_to(top), spec, ops[key]))
+
+    return jobs
+
+
+def run(jobs: Sequence[Job], workers: int = None) -> List[Dict[str, float]]:
+    """regrid each job in a process pool, returning timing of each job in order"""
+    workers = workers or os.cpu_count() or 1
+
+    args = ([j.ifn for j in jobs], [j.ofn for j in jobs], [j.op for j in jobs])
+    if workers == 1:
+        return list(map(regrid, *args))
+
+    with ProcessPoolExecutor(workers) as exe:
+        return list(exe.map(regrid, *args))
+
+
+def summary(jobs: Sequence[Job], times: Sequence[Dict[str, float]]):
+    """print timing of each file and total"""
+    print(f"{'spec':>16} {'nx':>5} {'read':>8} {'interp':>8} {'write':>8}  output")
+    for j, t in zip(jobs, times):
+        print(f"{j.spec.label:>16} {j.alt_km.size:5d} {t['read']:8.4f} {t['interp']:8.4f} {t['write']:8.4f}  {j.ofn}")
+    tot = {k: sum(t[k] for t in times) for k in ("read", "interp", "write")}
+    print(f"{'total':>16} {'':>5} {tot['read']:8.4f} {tot['interp']:8.4f} {tot['write']:8.4f}  {len(jobs)} files")
+
+
+def main():
+    p = ArgumentParser(description="interpolate and rewrite many MSIS initial conditions files to new altitude grids")
+    p.add_argument("infn", help="initial conditions files e.g. 90kmmaxpt123.dat", nargs="+")
+    p.add_argument("-o", "--outdir", help="output directory", required=True)
+    p.add_argument("-s", "--spec", help="grids method:dz[,dz2][,n=N] e.g. linear:2 tanh:1,5 incr:n=250", nargs="+", required=True)
+    p.add_argument("-j", "--workers", help="number of worker processes (default: all CPUs)", type=int)
+    p = p.parse_args()
+
+    jobs = plan(p.infn, [GridSpec.parse(s) for s in p.spec], p.outdir)
+
+    tic = perf_counter()
+    times = run(jobs, p.workers)
+    summary(jobs, times)
+    print(f"{perf_counter() - tic:.3f} s elapsed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+load many Transcar beam directories (beam<energy eV>/) in parallel into one Dataset
+along dimension "beam_energy_eV"
+"""
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Union, Sequence, Callable
+import os
+import numpy as np
+import xarray
+
+from . import ExcitationRates, calcVERtc, read_tra, KINFN
+from .interp import AltInterp
+from . import cache as _cache
+
+# file that must exist in a beam directory for each kind
+KINDS = {
+    "excitation": KINFN,
+    "ver": KINFN,
+    "iono": "dir.output/transcar_output",
+}
+
+
+def beamdirs(root: Path, kind: str = "excitation") -> List[Path]:
+    """beam directories under root having output for kind, sorted by beam energy"""
+    root = Path(root).expanduser()
+    if not root.is_dir():
+        raise NotADirectoryError(root)
+
+    dirs = [d for d in root.glob("beam*") if (d / KINDS[kind]).is_file()]
+    if not dirs:
+        raise FileNotFoundError(f"no beams with {KINDS[kind]} found in {root}")
+
+    return sorted(dirs, key=beam_energy)
+
+
+def beam_energy(beamdir: Path) -> float:
+    """beam energy [eV] from directory name e.g. beam52.7"""
+    return float(Path(beamdir).name[4:])
+
+
+def read_beams(
+    root: Union[Path, Sequence[Path]],
+    kind: str = "excitation",
+    workers: int = None,
+    batch: int = None,
+    tReq=None,
+    config_fn: Path = Path("DATCAR"),
+    cache: Union[bool, Path] = False,
+) -> xarray.Dataset:
+    """
+    read every beam in a process pool, results combined in input order
+
+    Parameters
+    ----------
+
+    root: pathlib.Path or list of pathlib.Path
+        directory containing beam* directories, or list of beam directories
+    kind: str
+        "excitation": ExcitationRates (time x alt_km x reaction)
+        "ver": calcVERtc excitation rates at tReq (alt_km x reaction)
+        "iono": read_tra ionosphere state and ISR parameters
+    workers: int
+        number of processes, default os.cpu_count(). 1 reads in this process.
+    batch: int
+        beams in flight at once, default workers. Bounds memory used by results in transit.
+    tReq: datetime, optional
+        time to extract (required for "ver")
+    config_fn: pathlib.Path
+        Transcar input file name under dir.input/ for "ver"
+    cache: bool or pathlib.Path
+        passed to the reader, see transcarread.cache
+
+    Returns
+    -------
+
+    beams: xarray.Dataset
+        reader output of each beam stacked along "beam_energy_eV".
+        Beams on different altitude grids or times are outer-joined (NaN fill).
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {list(KINDS)}")
+
+    dirs = _dirs(root, kind)
+
+    reader = partial(_read_beam, kind=kind, tReq=tReq, config_fn=config_fn, cache=cache)
+    dats = _map_beams(reader, dirs, workers, batch)
+
+    energy = xarray.DataArray(np.array([beam_energy(d) for d in dirs]), dims="beam_energy_eV", name="beam_energy_eV")
+
+    return xarray.concat(dats, energy)
+
+
+def eigenprofiles(
+    root: Union[Path, Sequence[Path]],
+    tReq,
+    alt_km: np.ndarray = None,
+    workers: int = None,
+    batch: int = None,
+    config_fn: Path = Path("DATCAR"),
+    cache: Union[bool, Path] = False,
+    fill: float = np.nan,
+) -> xarray.DataArray:
+    """
+    excitation matrix p(z, E) of every beam at time tReq, the basis of the VER eigenprofiles (see calcVERtc)
+
+    Parameters
+    ----------
+
+    root: pathlib.Path or list of pathlib.Path
+        directory containing beam* directories, or list of beam directories
+    tReq: datetime
+        time to extract
+    alt_km: numpy.ndarray, optional
+        common altitude grid, default is the grid of the first beam.
+        Beams on other grids are linearly interpolated to it, all beams and reactions at once.
+    workers, batch, config_fn, cache:
+        see read_beams
+    fill: float
+        value where alt_km is outside a beam's altitude grid
+
+    Returns
+    -------
+
+    peigen: xarray.DataArray
+        alt_km x beam_energy_eV x reaction
+    """
+    dirs = _dirs(root, "ver")
+
+    reader = partial(_read_beam, kind="ver", tReq=tReq, config_fn=config_fn, cache=cache)
+    vers = [v["excitation"] for v in _map_beams(reader, dirs, workers, batch)]
+    # %% stack native grids, NaN padded to the longest grid
+    nmax = max(v.alt_km.size for v in vers)
+    src = np.full((len(vers), nmax), np.nan)
+    y = np.full((len(vers), nmax, vers[0].reaction.size), np.nan)
+    for j, v in enumerate(vers):
+        src[j, :v.alt_km.size] = v.alt_km
+        y[j, :v.alt_km.size] = v.values
+
+    if alt_km is None:
+        alt_km = vers[0].alt_km.values
+    # %% all beams to common grid in one operation
+    peigen = AltInterp(src, alt_km, fill)(y)
+
+    return xarray.DataArray(
+        peigen.transpose(1, 0, 2),
+        coords={
+            "alt_km": alt_km,
+            "beam_energy_eV": [beam_energy(d) for d in dirs],
+            "reaction": vers[0].reaction.values,
+            "time": ("beam_energy_eV", [v.time.values for v in vers]),
+        },
+        dims=["alt_km", "beam_energy_eV", "reaction"],
+        name="peigen",
+    )
+
+
+def save_eigenprofiles(peigen: xarray.DataArray, path: Path):
+    """save eigenprofile matrix as a directory of .npy files, for load_eigenprofiles"""
+    _cache.write(Path(path).expanduser(), peigen.to_dataset(name="peigen"))
+
+
+def load_eigenprofiles(path: Path) -> xarray.DataArray:
+    """memory-map eigenprofile matrix saved by save_eigenprofiles"""
+    path = Path(path).expanduser()
+    ds = _cache.load(path)
+    if ds is None:
+        raise FileNotFoundError(path)
+
+    return ds["peigen"]
+
+
+def _dirs(root: Union[Path, Sequence[Path]], kind: str) -> List[Path]:
+    if isinstance(root, (str, Path)):
+        return beamdirs(root, kind)
+
+    return [Path(d).expanduser() for d in root]
+
+
+def _map_beams(reader: Callable[[Path], xarray.Dataset], dirs: List[Path], workers: int, batch: int) -> List[xarray.Dataset]:
+    """reader on each beam directory in a process pool, at most batch at a time, in order"""
+    workers = workers or os.cpu_count() or 1
+    batch = batch or workers
+
+    if workers == 1:
+        return list(map(reader, dirs))
+
+    dats: List[xarray.Dataset] = []
+    with ProcessPoolExecutor(workers) as exe:
+        for i in range(0, len(dirs), batch):
+            dats += exe.map(reader, dirs[i: i + batch])
+
+    return dats
+
+
+def _read_beam(beamdir: Path, kind: str, tReq, config_fn: Path, cache: Union[bool, Path]) -> xarray.Dataset:
+    if kind == "excitation":
+        return ExcitationRates(beamdir / KINFN, cache).to_dataset()
+    elif kind == "ver":
+        return calcVERtc(beamdir, tReq, config_fn, cache).to_dataset()
+    elif kind == "iono":
+        return read_tra(beamdir, tReq, cache=cache)
+
+    raise ValueError(f"unknown kind {kind}")
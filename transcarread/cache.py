@@ -0,0 +1,171 @@
+"""
+opt-in on-disk cache of parsed Transcar output, so unchanged files aren't reparsed.
+
+Each entry is a directory of .npy files (one per variable) plus meta.json,
+opened with memory mapping on a hit. Entries are keyed on file path, size, mtime,
+reader name and CACHE_VERSION. The least recently used entries are removed
+when the cache directory exceeds MAXBYTES.
+
+By default the cache directory "dir.cache" is made next to "dir.output".
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Union, Dict, Any, TYPE_CHECKING
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from .lazy import lazymodule
+
+if TYPE_CHECKING:
+    import xarray
+else:
+    xarray = lazymodule("xarray")
+
+CACHE_VERSION = 1  # increment when reader output changes, to invalidate old entries
+MAXBYTES = 2 ** 31  # size bound of each cache directory
+
+
+def cachedir(fn: Path) -> Path:
+    """default cache directory for a file under dir.output/"""
+    return Path(fn).expanduser().resolve().parent.parent / "dir.cache"
+
+
+def cachekey(fn: Path, reader: str) -> str:
+    """key changes if file is modified or reader changes"""
+    fn = Path(fn).expanduser().resolve()
+    st = fn.stat()
+
+    return hashlib.sha1(f"{fn}|{st.st_size}|{st.st_mtime_ns}|{reader}|{CACHE_VERSION}".encode("utf8")).hexdigest()
+
+
+def cached(fn: Path, reader: str, read: Callable[[], xarray.Dataset], cache: Union[bool, Path] = True) -> xarray.Dataset:
+    """
+    load reader output for fn from the cache, or read and store it
+
+    Parameters
+    ----------
+
+    fn: pathlib.Path
+        file that read() parses
+    reader: str
+        name of the reader, part of the cache key
+    read: callable
+        returns xarray.Dataset parsed from fn
+    cache: bool or pathlib.Path
+        True: use default cache directory (see cachedir), or path to cache directory
+
+    A cache that can't be written, e.g. read-only directory, is logged and the parsed data returned.
+    """
+    cdir = Path(cache).expanduser() if isinstance(cache, (str, Path)) else cachedir(fn)
+    key = cachekey(fn, reader)
+
+    ds = load(cdir / key)
+    if ds is None:
+        ds = read()
+        try:
+            save(cdir, key, ds)
+        except OSError as e:
+            logging.info(f"could not save cache entry {cdir / key}: {e}")
+
+    return ds
+
+
+def load(entry: Path) -> xarray.Dataset:
+    """
+    memory-map a cache entry, None if not present or unreadable,
+    e.g. evicted by another process while loading
+    """
+    try:
+        meta = json.loads((entry / "meta.json").read_text())
+        os.utime(entry)  # mark as recently used
+
+        variables = {}
+        for i, v in enumerate(meta["variables"]):
+            variables[v["name"]] = (v["dims"], np.load(entry / f"{i}.npy", mmap_mode="r"), v["attrs"])
+    except (OSError, ValueError, KeyError) as e:
+        if not isinstance(e, FileNotFoundError) or entry.is_dir():
+            logging.info(f"ignoring unreadable cache entry {entry}: {e}")
+        return None
+
+    coords = {k: variables.pop(k) for k in meta["coords"]}
+
+    return xarray.Dataset(variables, coords=coords, attrs=meta["attrs"])
+
+
+def save(cdir: Path, key: str, ds: xarray.Dataset, maxbytes: int = None):
+    """write cache entry atomically, then evict least recently used entries beyond maxbytes"""
+    cdir.mkdir(parents=True, exist_ok=True)
+
+    tmp = Path(tempfile.mkdtemp(dir=cdir, prefix=".tmp"))
+    try:
+        write(tmp, ds)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    try:
+        tmp.rename(cdir / key)
+    except OSError:  # another process stored the same entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    evict(cdir, MAXBYTES if maxbytes is None else maxbytes)
+
+
+def write(entry: Path, ds: xarray.Dataset):
+    """write Dataset as directory of .npy files and meta.json, which load() memory-maps"""
+    entry.mkdir(parents=True, exist_ok=True)
+
+    meta: Dict[str, Any] = {"variables": [], "coords": list(ds.coords), "attrs": _jsonable(ds.attrs)}
+    for i, (name, v) in enumerate(ds.variables.items()):
+        values = v.values
+        if values.dtype == object:  # e.g. string coordinates
+            values = values.astype(str)
+        np.save(entry / f"{i}.npy", values, allow_pickle=False)
+        meta["variables"].append({"name": name, "dims": list(v.dims), "attrs": _jsonable(v.attrs)})
+    (entry / "meta.json").write_text(json.dumps(meta))
+
+
+def evict(cdir: Path, maxbytes: int):
+    """
+    remove least recently used cache entries until cdir is within maxbytes.
+    Entries removed meanwhile by another process are skipped.
+    """
+    entries = []
+    for e in cdir.iterdir():
+        if e.name.startswith(".tmp"):
+            continue
+        try:
+            if e.is_dir():
+                entries.append((e.stat().st_mtime, sum(f.stat().st_size for f in e.iterdir()), e))
+        except FileNotFoundError:
+            continue
+
+    total = sum(e[1] for e in entries)
+    for _, size, e in sorted(entries):
+        if total <= maxbytes:
+            break
+        logging.info(f"evicting cache entry {e}")
+        shutil.rmtree(e, ignore_errors=True)
+        total -= size
+
+
+def _jsonable(attrs: dict) -> dict:
+    out = {}
+    for k, v in attrs.items():
+        if isinstance(v, np.generic):
+            v = v.item()
+        elif isinstance(v, Path):
+            v = str(v)
+        elif isinstance(v, datetime):
+            v = v.isoformat()
+        elif isinstance(v, dict):
+            v = _jsonable(v)
+        out[k] = v
+
+    return out
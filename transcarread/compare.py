@@ -0,0 +1,107 @@
+"""
+compare the transcar_output of two or more runs, e.g. regression testing of model builds,
+streaming all runs a chunk of records at a time in lockstep so memory is bounded by the chunk size.
+
+Each run is compared with the first (reference) run at every reference record time,
+using the record of the run nearest in time, as picktime does.
+Runs on a different altitude grid are interpolated to the reference grid.
+"""
+from pathlib import Path
+from contextlib import ExitStack
+from typing import Sequence, Tuple, IO, Any
+import numpy as np
+import xarray
+
+from . import PARAM, ISRPARAM, traheader, read_index, timeindex, readrecords, decoderecords
+from .interp import AltInterp
+
+
+def compare(
+    paths: Sequence[Path], chunk: int = 100, atol: float = 0.0, rtol: float = 0.0, dtype=None
+) -> xarray.Dataset:
+    """
+    difference statistics of each run with the reference run, per parameter
+
+    Parameters
+    ----------
+
+    paths: list of pathlib.Path
+        paths above dir.output/transcar_output, the first is the reference
+    chunk: int
+        number of reference records held at a time
+    atol, rtol: float
+        a value diverges where abs(run - reference) > atol + rtol * abs(reference)
+    dtype: optional
+        precision of the comparison, see read_tra
+
+    Returns
+    -------
+
+    stats: xarray.Dataset
+        (run, param) max_abs, rms, first_time, first_alt_km of first divergence (NaT, NaN if none)
+        and (run,) time_offset: largest time difference between compared records
+    """
+    if len(paths) < 2:
+        raise ValueError("need a reference run and at least one run to compare")
+    if chunk < 1:
+        raise ValueError("chunk must be >= 1")
+
+    tcofns = [Path(p).expanduser() / "dir.output/transcar_output" for p in paths]
+    hds = [traheader(fn) for fn in tcofns]
+    times = [read_index(fn, persist=False)["time"] for fn in tcofns]
+    t0 = times[0]
+    # record of each run nearest to each reference record
+    inds = [np.atleast_1d(timeindex(t, t0)) for t in times[1:]]
+
+    names = PARAM + ISRPARAM
+    shape = (len(inds), len(names))
+    max_abs = np.zeros(shape)
+    sumsq = np.zeros(shape)
+    count = np.zeros(shape, int)
+    first_time = np.full(shape, np.datetime64("NaT"), "datetime64[s]")
+    first_alt = np.full(shape, np.nan)
+    offset = np.array([abs(t[i] - t0).max() for t, i in zip(times[1:], inds)])
+
+    with ExitStack() as stack:
+        files = [stack.enter_context(fn.open("rb")) for fn in tcofns]
+        for i in range(0, t0.size, chunk):
+            j = np.arange(i, min(i + chunk, t0.size))
+            alt, ref = _block(files[0], hds[0], j, tcofns[0], dtype)
+            for r, ind in enumerate(inds):
+                ralt, run = _block(files[r + 1], hds[r + 1], ind[j], tcofns[r + 1], dtype)
+                if ralt.size != alt.size or (ralt != alt).any():
+                    run = AltInterp(ralt, alt)(run)
+
+                d = abs(run - ref)  # (time, alt_km, param)
+                finite = np.isfinite(d)
+                max_abs[r] = np.maximum(max_abs[r], np.where(finite, d, 0).max(axis=(0, 1)))
+                sumsq[r] += np.where(finite, d ** 2, 0).sum(axis=(0, 1))
+                count[r] += finite.sum(axis=(0, 1))
+                # %% first divergence in time then altitude, for parameters not yet diverged
+                diverged = (d > atol + rtol * abs(ref)).reshape((-1, len(names)))
+                new = np.isnat(first_time[r]) & diverged.any(axis=0)
+                k = diverged[:, new].argmax(axis=0)
+                first_time[r, new] = t0[j[k // alt.size]]
+                first_alt[r, new] = alt[k % alt.size]
+
+    with np.errstate(invalid="ignore"):
+        rms = np.sqrt(sumsq / count)
+
+    return xarray.Dataset(
+        {
+            "max_abs": (("run", "param"), max_abs),
+            "rms": (("run", "param"), rms),
+            "first_time": (("run", "param"), first_time),
+            "first_alt_km": (("run", "param"), first_alt),
+            "time_offset": ("run", offset),
+        },
+        coords={"run": [str(p) for p in paths[1:]], "param": names},
+        attrs={"reference": str(paths[0]), "n_t": t0.size, "atol": atol, "rtol": rtol},
+    )
+
+
+def _block(f: IO[Any], hd: dict, ind: np.ndarray, fn: Path, dtype) -> Tuple[np.ndarray, np.ndarray]:
+    """altitudes and (time, alt_km, PARAM + ISRPARAM) of records ind"""
+    ds = decoderecords(readrecords(f, hd, ind), hd, fn, dtype)
+
+    return ds.alt_km.values, np.concatenate((ds["iono"].loc[..., PARAM].values, ds["pp"].loc[..., ISRPARAM].values), axis=-1)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""
+convert transcar_output or emissions.dat to a chunked, compressed Zarr or NetCDF4 store,
+streaming a block of time steps at a time so memory is bounded by the chunk size.
+
+An interrupted conversion resumes from the last completed block, if the input file is unchanged.
+
+    transcarread-convert tests/data/beam52.7/dir.output/transcar_output out.zarr --chunks time=100 alt_km=50
+
+requires: zarr (.zarr output) or netCDF4 (.nc output)
+"""
+from pathlib import Path
+from argparse import ArgumentParser
+from datetime import datetime
+from typing import Dict, Any, Iterator, Tuple, Union
+import logging
+import shutil
+import numpy as np
+import xarray
+
+from . import traheader, readrecords, initparams
+from .backend import TranscarBackendEntrypoint, filekind, decodetra, reademissionsteps
+from .io import emissions_offsets
+
+TIME_UNITS = "microseconds since 1970-01-01 00:00:00"
+
+
+def convert(infn: Path, outfn: Path, chunks: Dict[str, int] = None, complevel: int = 4, resume: bool = True) -> Path:
+    """
+    Parameters
+    ----------
+
+    infn: pathlib.Path
+        transcar_output or emissions.dat
+    outfn: pathlib.Path
+        output store, format by suffix: .zarr or .nc
+    chunks: dict
+        chunk size of each dimension, default time: 100, other dimensions whole
+    complevel: int
+        compression level 0..9
+    resume: bool
+        continue a partially written outfn instead of starting over
+
+    Returns
+    -------
+
+    outfn: pathlib.Path
+        output store
+    """
+    infn = Path(infn).expanduser().resolve()
+    outfn = Path(outfn).expanduser()
+
+    src = TranscarBackendEntrypoint().open_dataset(infn)  # lazy
+    if "time" not in src.dims:
+        raise ValueError(f"{infn} has no time dimension to stream")
+    n_t = src.time.size
+
+    chunks = {**{d: n for d, n in src.dims.items()}, "time": 100, **(chunks or {})}
+    chunks = {d: min(n, src.dims[d]) for d, n in chunks.items() if d in src.dims}
+
+    if outfn.suffix == ".zarr":
+        Store = ZarrStore
+    elif outfn.suffix == ".nc":
+        Store = NetcdfStore
+    else:
+        raise ValueError("output format must be .zarr or .nc")
+    # %% resume or create
+    store = None
+    if outfn.exists():
+        if resume:
+            store = Store.open(outfn)
+            attrs = store.attrs
+            if any(attrs.get(k) != v for k, v in _source(infn, n_t).items()):
+                store.close()
+                raise ValueError(f"{outfn} is from a different or changed file than {infn}, use resume=False")
+        else:
+            shutil.rmtree(outfn) if outfn.is_dir() else outfn.unlink()
+
+    if store is None:
+        store = Store.create(outfn)
+        _define(store, src, infn, chunks, complevel)
+
+    start = store.attrs["records_written"]
+    if start:
+        logging.info(f"resuming {outfn} at time step {start} / {n_t}")
+    # %% stream blocks of whole time chunks
+    step = chunks["time"]
+    for i, block in _blocks(infn, src, start, step):
+        for name, values in block.items():
+            store.write(name, i, values)
+        store.set_progress(min(i + step, n_t))
+
+    store.close()
+
+    return outfn
+
+
+def _blocks(infn: Path, src: xarray.Dataset, start: int, step: int) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+    """
+    first time step and time-dependent variables of each block of step time steps from start.
+    The records of a block are read once for all its variables.
+    """
+    n_t = src.time.size
+
+    if filekind(infn) == "tra":
+        hd = traheader(infn)
+        with infn.open("rb") as f:
+            for i in range(start, n_t, step):
+                ind = np.arange(i, min(i + step, n_t))
+                yield i, {**decodetra(readrecords(f, hd, ind), hd), "chi": src["chi"].values[ind]}
+    else:
+        offsets = emissions_offsets(infn, initparams(infn)[5] + 1)
+        for i in range(start, n_t, step):
+            ind = np.arange(i, min(i + step, n_t))
+            yield i, reademissionsteps(infn, offsets, ind, src.alt_km.size, src.dims["e"])
+
+
+def _define(store: Union["ZarrStore", "NetcdfStore"], src: xarray.Dataset, infn: Path, chunks: Dict[str, int], complevel: int):
+    """create all variables, writing coordinates and time-independent data"""
+    attrs = {k: _attr(v) for k, v in src.attrs.items()}
+    if filekind(infn) == "tra":  # header of first record
+        attrs.update({f"hd_{k}": _attr(v) for k, v in traheader(infn).items()})
+    attrs.update({**_source(infn, src.time.size), "records_written": 0})
+
+    for d, n in src.dims.items():
+        store.dimension(d, n)
+
+    for name, v in src.variables.items():
+        vattrs = dict(v.attrs)
+        if name not in src.coords and "time" in v.dims:  # written by blocks, not read here
+            store.variable(name, v.dims, v.dtype, tuple(chunks[d] for d in v.dims), complevel, vattrs)
+            continue
+
+        values = v.values
+        if name == "time":
+            values = (values - np.datetime64("1970-01-01")) // np.timedelta64(1, "us")
+            vattrs.update({"units": TIME_UNITS, "calendar": "proleptic_gregorian"})
+        elif values.dtype.kind in "OU":
+            values = values.astype(str)
+
+        store.variable(name, v.dims, values.dtype, tuple(chunks[d] for d in v.dims), complevel, vattrs)
+        store.write(name, 0, values)
+
+    store.set_attrs(attrs)
+
+
+def _source(infn: Path, n_t: int) -> Dict[str, Any]:
+    """identifies the input file, so that only output of the same unchanged file is resumed"""
+    st = infn.stat()
+
+    return {"source": str(infn), "source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns, "n_t": n_t}
+
+
+def _attr(v: Any) -> Any:
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, Path):
+        return str(v)
+
+    return v
+
+
+class ZarrStore:
+    def __init__(self, group):
+        self.g = group
+        self.dims: Dict[str, int] = {}
+
+    @classmethod
+    def create(cls, fn: Path) -> "ZarrStore":
+        import zarr
+
+        return cls(zarr.open_group(str(fn), mode="w"))
+
+    @classmethod
+    def open(cls, fn: Path) -> "ZarrStore":
+        import zarr
+
+        return cls(zarr.open_group(str(fn), mode="r+"))
+
+    @property
+    def attrs(self) -> dict:
+        return dict(self.g.attrs)
+
+    def dimension(self, name: str, size: int):
+        self.dims[name] = size  # zarr arrays carry dimension names in attribute _ARRAY_DIMENSIONS
+
+    def variable(self, name: str, dims: tuple, dtype, chunks: tuple, complevel: int, attrs: dict):
+        from numcodecs import Blosc
+
+        shape = tuple(self.dims[d] for d in dims)
+        z = self.g.create_dataset(
+            name, shape=shape, chunks=chunks, dtype=dtype, compressor=Blosc(clevel=complevel), fill_value=None
+        )
+        z.attrs.update({**attrs, "_ARRAY_DIMENSIONS": list(dims)})
+
+    def write(self, name: str, i: int, values: np.ndarray):
+        z = self.g[name]
+        if z.shape and z.attrs["_ARRAY_DIMENSIONS"][0] == "time":
+            z[i: i + values.shape[0]] = values
+        else:
+            z[...] = values
+
+    def set_attrs(self, attrs: dict):
+        self.g.attrs.update(attrs)
+
+    def set_progress(self, n: int):
+        self.g.attrs["records_written"] = n
+
+    def close(self):
+        import zarr
+
+        zarr.consolidate_metadata(self.g.store)
+
+
+class NetcdfStore:
+    def __init__(self, nc):
+        self.nc = nc
+
+    @classmethod
+    def create(cls, fn: Path) -> "NetcdfStore":
+        import netCDF4
+
+        return cls(netCDF4.Dataset(fn, "w"))
+
+    @classmethod
+    def open(cls, fn: Path) -> "NetcdfStore":
+        import netCDF4
+
+        return cls(netCDF4.Dataset(fn, "a"))
+
+    @property
+    def attrs(self) -> dict:
+        return {k: self.nc.getncattr(k) for k in self.nc.ncattrs()}
+
+    def dimension(self, name: str, size: int):
+        self.nc.createDimension(name, size)
+
+    def variable(self, name: str, dims: tuple, dtype, chunks: tuple, complevel: int, attrs: dict):
+        if dtype.kind == "U":
+            v = self.nc.createVariable(name, str, dims)
+        else:
+            v = self.nc.createVariable(name, dtype, dims, zlib=complevel > 0, complevel=complevel, chunksizes=chunks or None)
+        v.setncatts({k: _attr(a) for k, a in attrs.items()})
+
+    def write(self, name: str, i: int, values: np.ndarray):
+        v = self.nc[name]
+        if v.dimensions and v.dimensions[0] == "time":
+            v[i: i + values.shape[0]] = values
+        elif values.dtype.kind == "U":
+            for j, s in enumerate(values):
+                v[j] = s
+        else:
+            v[...] = values
+
+    def set_attrs(self, attrs: dict):
+        self.nc.setncatts(attrs)
+
+    def set_progress(self, n: int):
+        self.nc.setncattr("records_written", n)
+        self.nc.sync()
+
+    def close(self):
+        self.nc.close()
+
+
+def main():
+    p = ArgumentParser(description="convert transcar_output or emissions.dat to chunked compressed Zarr or NetCDF4")
+    p.add_argument("infn", help="transcar_output or emissions.dat")
+    p.add_argument("outfn", help="output .zarr or .nc")
+    p.add_argument("--chunks", help="chunk size per dimension e.g. time=100 alt_km=50", nargs="+", default=[])
+    p.add_argument("--complevel", help="compression level 0..9", type=int, default=4)
+    p.add_argument("--no-resume", help="overwrite existing output instead of resuming", action="store_true")
+    p = p.parse_args()
+
+    chunks = {k: int(v) for k, v in (c.split("=") for c in p.chunks)}
+
+    print("wrote", convert(p.infn, p.outfn, chunks, p.complevel, not p.no_resume))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+follow the output files of a Transcar simulation that is still running.
+
+A follower remembers the byte offset after the last complete record it decoded.
+Each poll() decodes only the complete records written since, and appends them to buffers that
+grow by doubling, so monitoring a live run costs O(new data) per poll rather than rereading the file.
+
+    f = TraFollower(beamdir)
+    while running:
+        new = f.poll()  # None if no new complete record
+        ...
+        sleep(1)
+    f.data  # every record so far, as read_tra(beamdir, memmap=True)
+
+A record being written is left for a later poll. If the file shrinks, e.g. the simulation was restarted,
+the follower starts over from the beginning of the file.
+With keep=False, records are only returned by poll() and not kept, so a follower holds no history.
+"""
+from pathlib import Path
+from typing import Dict, Optional
+from abc import ABC, abstractmethod
+import logging
+import numpy as np
+import xarray
+
+from . import (
+    KINFN,
+    nhead,
+    d_bytes,
+    NumPerRow,
+    NdataCol,
+    NprecipCol,
+    REACTION,
+    traheader,
+    readrecords,
+    decoderecords,
+    initparams,
+    parseheadtimes,
+    span,
+)
+
+
+class Growing:
+    """(n, ...) array appended along its first axis, in a buffer that doubles when full"""
+
+    def __init__(self, shape: tuple, dtype, capacity: int = 16):
+        self.n = 0
+        self._buf = np.empty((capacity, *shape), dtype)
+
+    def append(self, x: np.ndarray):
+        m = self.n + x.shape[0]
+        if m > self._buf.shape[0]:
+            buf = np.empty((max(m, 2 * self._buf.shape[0]), *self._buf.shape[1:]), self._buf.dtype)
+            buf[: self.n] = self._buf[: self.n]
+            self._buf = buf
+        self._buf[self.n: m] = x
+        self.n = m
+
+    @property
+    def values(self) -> np.ndarray:
+        """view of the appended rows, valid until the next append"""
+        return self._buf[: self.n]
+
+
+class Follower(ABC):
+    """
+    base of followers: tracks the file offset and restarts when the file shrinks.
+    Subclasses implement _start, reading the file layout from its beginning, and _read, decoding new records
+    and, with keep, making the history buffers on the first records.
+    """
+
+    def __init__(self, fn: Path, dtype=None, keep: bool = True):
+        self.fn = Path(fn).expanduser()
+        self.dtype = dtype
+        self.keep = keep
+        self.offset = 0
+        self.size = 0  # file size at last poll
+        self.n_t = 0
+        self._started = False
+        self._bufs: Dict[str, Growing] = {}
+
+    def changed(self) -> bool:
+        """whether the file size changed since the last poll, by a stat call only"""
+        try:
+            return self.fn.stat().st_size != self.size
+        except FileNotFoundError:
+            return False
+
+    def poll(self) -> Optional[xarray.Dataset]:
+        """decode the complete records written since the last poll, None if there are none"""
+        try:
+            size = self.fn.stat().st_size
+        except FileNotFoundError:  # simulation not started yet
+            return None
+        self.size = size
+
+        if size < self.offset:
+            logging.warning(f"{self.fn} shrank from {self.offset} to {size} bytes, restarting")
+            self.offset = self.n_t = 0
+            self._started = False
+            self._bufs = {}
+        if size == self.offset:
+            return None
+
+        if not self._started:
+            if not self._start(size):
+                return None
+            self._started = True
+
+        new = self._read(size)
+        if new is None:
+            return None
+
+        for k, buf in self._bufs.items():  # including the time coordinate, none without keep
+            buf.append(new[k].values)
+        self.n_t += new.time.size
+
+        return new
+
+    def _history(self) -> bool:
+        """whether there are records kept for .data"""
+        if not self.keep:
+            raise ValueError(f"{self.fn} is followed with keep=False, records are only returned by poll()")
+
+        return self.n_t > 0
+
+    @abstractmethod
+    def _start(self, size: int) -> bool:
+        """read the file layout from its beginning, False if it is not yet complete"""
+
+    @abstractmethod
+    def _read(self, size: int) -> Optional[xarray.Dataset]:
+        """decode the complete records from offset up to size, None if there are none"""
+
+
+class TraFollower(Follower):
+    """
+    follows binary transcar_output, whose records are of fixed size
+
+    Parameters
+    ----------
+
+    path: pathlib.Path
+        path above dir.output/transcar_output
+    dtype: optional
+        precision of iono and pp, see read_tra
+    keep: bool
+        keep every record for .data, else only return new records from poll()
+    """
+
+    def __init__(self, path: Path, dtype=None, keep: bool = True):
+        super().__init__(Path(path).expanduser() / "dir.output/transcar_output", dtype, keep)
+
+    def _start(self, size: int) -> bool:
+        if size < nhead * d_bytes:
+            return False
+
+        self.hd = traheader(self.fn)
+        self.nbytes = self.hd["size_record"] * d_bytes
+
+        return True
+
+    def _read(self, size: int) -> Optional[xarray.Dataset]:
+        k = (size - self.offset) // self.nbytes
+        if k == 0:
+            return None
+
+        i0 = self.offset // self.nbytes
+        with self.fn.open("rb") as f:
+            raw = readrecords(f, self.hd, np.arange(i0, i0 + k))
+        new = decoderecords(raw, self.hd, self.fn, self.dtype)
+        self.offset += k * self.nbytes
+
+        if self.keep and not self._bufs:
+            self._alt = new.alt_km.values
+            self._coords = {"isrparam": new.iono.isrparam.values, "ppparam": new.pp.isrparam.values}
+            self._attrs = new.attrs
+            for v in ("iono", "pp"):
+                self._bufs[v] = Growing(new[v].shape[1:], new[v].dtype)
+            self._bufs["time"] = Growing((), new.time.dtype)
+
+        return new
+
+    @property
+    def data(self) -> Optional[xarray.Dataset]:
+        """every record decoded so far, None before the first"""
+        if not self._history():
+            return None
+
+        b = self._bufs
+        t = ("time", b["time"].values)
+        return xarray.Dataset(
+            {
+                "iono": xarray.DataArray(
+                    b["iono"].values,
+                    coords=[t, ("alt_km", self._alt), ("isrparam", self._coords["isrparam"])],
+                    attrs={"filename": str(self.fn)},
+                ),
+                "pp": xarray.DataArray(
+                    b["pp"].values,
+                    coords=[t, ("alt_km", self._alt), ("isrparam", self._coords["ppparam"])],
+                    attrs={"filename": str(self.fn)},
+                ),
+            },
+            attrs=self._attrs,
+        )
+
+
+class EmissionsFollower(Follower):
+    """
+    follows ASCII emissions.dat, whose time steps are a header line then ndatrow lines of numbers:
+    the data and precip blocks, each starting on a new line (see initparams)
+
+    Parameters
+    ----------
+
+    path: pathlib.Path
+        path above dir.output/emissions.dat
+    dtype: optional
+        precision of parsed values, see readexcrates
+    keep: bool
+        keep every time step for .data, else only return new time steps from poll()
+    """
+
+    def __init__(self, path: Path, dtype=None, keep: bool = True):
+        super().__init__(Path(path).expanduser() / KINFN, dtype, keep)
+
+    def _start(self, size: int) -> bool:
+        with self.fn.open("rb") as f:
+            if not f.readline().endswith(b"\n"):  # first header line incomplete
+                return False
+
+        _, self.nalt, self.nen, _, _, ndatrow, ndat, self.Nprecip = initparams(self.fn)
+        self.nline = ndatrow + 1  # with header
+        self.size_record = ndat + self.Nprecip + NumPerRow
+
+        return True
+
+    def _read(self, size: int) -> Optional[xarray.Dataset]:
+        with span("reademissions") as s:
+            with self.fn.open("rb") as f:
+                f.seek(self.offset)
+                block = f.read(size - self.offset)
+            s.add(nbytes=len(block))
+            # %% complete time steps only
+            ends = np.flatnonzero(np.frombuffer(block, np.uint8) == ord("\n"))
+            k = ends.size // self.nline
+            if k == 0:
+                return None
+            cut = int(ends[k * self.nline - 1]) + 1
+
+            v = np.fromstring(block[:cut], dtype=self.dtype or np.float64, sep=" ")
+            if v.size != k * self.size_record:
+                raise ValueError(f"{self.fn}: parsed {v.size} values at byte {self.offset}, expected {k * self.size_record}")
+            s.add(records=k)
+        self.offset += cut
+
+        recs = v.reshape((k, self.size_record))
+        t = parseheadtimes(recs[:, :NumPerRow])
+        d = recs[:, NumPerRow: -self.Nprecip].reshape((k, self.nalt, NdataCol), order="C")
+        p = recs[:, -self.Nprecip:].reshape((k, self.nen, NprecipCol), order="C")
+
+        if self.keep and not self._bufs:
+            self._alt = d[0, :, 0].copy()
+            self._bufs = {
+                "excitation": Growing(d.shape[1:2] + (NdataCol - 1,), v.dtype),
+                "precip": Growing(p.shape[1:], v.dtype),
+                "time": Growing((), t.dtype),
+            }
+
+        return xarray.Dataset(
+            {
+                "excitation": xarray.DataArray(
+                    d[..., 1:],
+                    coords={"time": t, "alt_km": d[-1, :, 0], "reaction": REACTION},
+                    dims=["time", "alt_km", "reaction"],
+                ),
+                "precip": xarray.DataArray(p, coords={"time": t}, dims=["time", "e", "fluxdown"]),
+            }
+        )
+
+    @property
+    def data(self) -> Optional[xarray.Dataset]:
+        """every time step decoded so far, as readexcrates; None before the first"""
+        if not self._history():
+            return None
+
+        b = self._bufs
+        t = b["time"].values
+        return xarray.Dataset(
+            {
+                "excitation": xarray.DataArray(
+                    b["excitation"].values,
+                    coords={"time": t, "alt_km": self._alt, "reaction": REACTION},
+                    dims=["time", "alt_km", "reaction"],
+                ),
+                "precip": xarray.DataArray(b["precip"].values, coords={"time": t}, dims=["time", "e", "fluxdown"]),
+            }
+        )
@@ -0,0 +1,93 @@
+"""
+altitude grids for Transcar initial conditions, each method in closed form.
+
+Grids are given either by spacing, or by number of points n:
+with n, the last spacing parameter of the method is solved so the grid spans z0..z1 in exactly n points.
+Every method's top altitude is linear in its last spacing parameter, so this is exact without iteration.
+
+Generated grids are memoized by their parameters and returned read-only.
+"""
+from functools import lru_cache
+from typing import Tuple
+import numpy as np
+
+from .ztanh import _ztanh
+
+toobig = 300  # beyond which number of altitude cells transcar will crash
+
+METHODS = {"linear": 1, "incr": 1, "tanh": 2}  # number of spacing parameters
+
+
+@lru_cache(maxsize=256)
+def altgrid(z0: float, z1: float, method: str, dz: Tuple[float, ...] = (), n: int = None) -> np.ndarray:
+    """
+    Parameters
+    ----------
+
+    z0, z1: float
+        bottom and top altitude [km]
+    method: str
+        linear: constant spacing dz[0]
+        incr: spacing starting at dz[0], increasing by dz[0] each step, z = z0 + dz[0] * k (k + 1) / 2
+        tanh: spacing increasing from dz[0] toward dz[0] + dz[1] as tanh, see ztanh.setupz
+    dz: tuple of float
+        spacing parameters [km]. With n, the last parameter is omitted and solved for.
+    n: int, optional
+        number of points, at most toobig when solving for spacing. Required for tanh.
+
+    Returns
+    -------
+
+    z: numpy.ndarray
+        altitude grid [km]. Spacing mode grids stop below z1, except tanh which has n points regardless.
+    """
+    method = method.lower()
+    if method not in METHODS:
+        raise ValueError(f"unknown grid method {method}, must be one of {list(METHODS)}")
+
+    L = z1 - z0
+    if L <= 0:
+        raise ValueError("z1 must be above z0")
+
+    solve = n is not None and len(dz) == METHODS[method] - 1
+    if not solve and len(dz) != METHODS[method]:
+        raise ValueError(f"{method} grid takes {METHODS[method]} spacing parameters, or one fewer with n")
+    if n is not None:
+        if n < 2 or (solve and n > toobig):
+            raise ValueError(f"number of points must be 2 .. {toobig}")
+        k = np.arange(n)
+    # %% closed form of each method
+    if method == "linear":
+        if solve:
+            return _frozen(np.linspace(z0, z1, n))
+        k = np.arange(np.ceil(L / dz[0]))  # as np.arange(z0, z1, dz)
+        z = z0 + dz[0] * k
+    elif method == "incr":
+        if solve:  # z[n-1] = z1
+            return _frozen(z0 + L * k * (k + 1) / (n * (n - 1)))
+        # last k with dz * k (k + 1) / 2 < L
+        m = int(np.ceil((np.sqrt(1 + 8 * L / dz[0]) - 1) / 2))
+        k = np.arange(m + 1)
+        z = z0 + dz[0] * k * (k + 1) / 2
+        z = z[z < z1]
+    elif method == "tanh":
+        if n is None:
+            raise ValueError("tanh grid requires number of points n")
+        if solve:  # dz[0] (n-1) + dzmax * sum(tanh) = L
+            tsum = (_ztanh(n, 0, 1)[:-1]).sum()
+            dzmax = (L - dz[0] * (n - 1)) / tsum
+            if dzmax < 0:
+                raise ValueError(f"{n} points of spacing at least {dz[0]} km exceed {L} km")
+            dz = (dz[0], dzmax)
+        step = _ztanh(n, dz[0], dz[1])
+        z = z0 + np.concatenate(([0.0], np.cumsum(step[:-1])))
+        if solve:
+            z[-1] = z1  # exact top despite rounding
+
+    return _frozen(z)
+
+
+def _frozen(z: np.ndarray) -> np.ndarray:
+    z = np.asarray(z, dtype=float)
+    z.setflags(write=False)
+    return z
@@ -0,0 +1,152 @@
+"""
+time catalog of transcar_output from record headers only.
+
+The index is saved next to the file as <filename>.index.npz,
+and extended rather than rebuilt when the file has grown.
+"""
+from pathlib import Path
+import logging
+import os
+import tempfile
+import zipfile
+import numpy as np
+
+from .io import headtimes, parseionoheaders
+
+d_bytes = 4
+
+INDEX_DTYPE = np.dtype(
+    [("offset", np.int64), ("time", "datetime64[s]"), ("chi", np.float32), ("approx", np.float32), ("nx", np.int32)]
+)
+
+
+def indexfile(tcofn: Path) -> Path:
+    tcofn = Path(tcofn).expanduser()
+    return tcofn.with_name(tcofn.name + ".index.npz")
+
+
+def record_size(tcofn: Path) -> int:
+    """number of float32 per transcar_output record, from the first header"""
+    with Path(tcofn).expanduser().open("rb") as f:
+        nx, ncol = np.fromfile(f, np.float32, 2).astype(int)
+
+    return 2 * ncol + nx * ncol
+
+
+def scan_index(tcofn: Path, start: int = 0) -> np.ndarray:
+    """
+    read the header of each transcar_output record from record "start" on.
+    Only the first header values of each record are touched.
+
+    Returns
+    -------
+
+    index: numpy.ndarray
+        structured array with fields offset [bytes], time, chi, approx, nx
+    """
+    tcofn = Path(tcofn).expanduser()
+    size_record = record_size(tcofn)
+    n_t = tcofn.stat().st_size // d_bytes // size_record
+
+    index = np.empty(max(n_t - start, 0), INDEX_DTYPE)
+    if index.size == 0:
+        return index
+
+    raw = np.memmap(tcofn, np.float32, "r", offset=start * size_record * d_bytes, shape=(index.size, size_record))
+    hd, bad = parseionoheaders(raw[:, :37])  # through "approx"
+    del raw
+    if bad.size:
+        raise ValueError(f"{tcofn}: bad record headers at indices {start + bad}")
+
+    index["offset"] = (start + np.arange(index.size)) * size_record * d_bytes
+    index["time"] = hd["htime"]
+    index["chi"] = hd["chi"]
+    index["approx"] = hd["approx"]
+    index["nx"] = hd["nx"]
+
+    return index
+
+
+def read_index(tcofn: Path, persist: bool = True) -> np.ndarray:
+    """
+    index of transcar_output records, loaded from the saved index when current.
+    A saved index of a file that has since grown is extended with the new records only.
+
+    Parameters
+    ----------
+
+    tcofn: pathlib.Path
+        transcar_output filename
+    persist: bool
+        save index next to tcofn (skipped with a log message if not writable)
+
+    Returns
+    -------
+
+    index: numpy.ndarray
+        structured array with fields offset [bytes], time, chi, approx, nx
+    """
+    tcofn = Path(tcofn).expanduser()
+    st = tcofn.stat()
+    ifn = indexfile(tcofn)
+
+    index = None
+    saved = _load(ifn) if ifn.is_file() else None
+    if saved is not None:
+        old, (size, mtime) = saved
+        if size == st.st_size and mtime == st.st_mtime_ns:
+            return old
+        if size < st.st_size and old.size and _unchanged(tcofn, old):
+            index = np.concatenate((old, scan_index(tcofn, old.size)))
+
+    if index is None:
+        index = scan_index(tcofn)
+
+    if persist:
+        try:
+            _save(ifn, index, np.array([st.st_size, st.st_mtime_ns]))
+        except OSError as e:
+            logging.info(f"could not save index {ifn}: {e}")
+
+    return index
+
+
+def _load(ifn: Path):
+    """saved index and its key (file size, mtime), None if unreadable e.g. corrupted"""
+    try:
+        with np.load(ifn) as f:
+            index, key = f["index"], f["key"]
+        if index.dtype != INDEX_DTYPE or key.shape != (2,):
+            raise ValueError("unexpected contents")
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        logging.info(f"ignoring unreadable index {ifn}: {e}")
+        return None
+
+    return index, key
+
+
+def _save(ifn: Path, index: np.ndarray, key: np.ndarray):
+    """written beside ifn then renamed, so concurrent readers never see a partially written index"""
+    fd, tmp = tempfile.mkstemp(dir=ifn.parent, prefix=f".{ifn.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, index=index, key=key)
+        os.replace(tmp, ifn)
+    finally:
+        if os.path.isfile(tmp):
+            os.unlink(tmp)
+
+
+def _unchanged(tcofn: Path, index: np.ndarray) -> bool:
+    """record size is the same and the first and last indexed records still have the indexed times"""
+    nbytes = record_size(tcofn) * d_bytes
+    if index["offset"][-1] != (index.size - 1) * nbytes:
+        return False
+
+    with tcofn.open("rb") as f:
+        for i in (0, index.size - 1):
+            f.seek(index["offset"][i])
+            if headtimes(np.fromfile(f, np.float32, 8))[0] != index["time"][i]:
+                return False
+
+    return True
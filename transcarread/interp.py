@@ -0,0 +1,77 @@
+"""
+precomputed linear interpolation between altitude grids, applied to every column at once
+"""
+from typing import Tuple
+import numpy as np
+
+
+def interpweights(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    linear interpolation operator from src to dst altitude grid:
+    y_dst = (1 - w) * y[i] + w * y[i + 1]
+
+    Parameters
+    ----------
+
+    src: numpy.ndarray
+        (..., n) increasing source grid, or a stack of grids.
+        Stacked grids of different length are padded with NaN at the end.
+    dst: numpy.ndarray
+        (m,) target grid
+
+    Returns
+    -------
+
+    i: numpy.ndarray
+        (..., m) index of lower source point
+    w: numpy.ndarray
+        (..., m) weight of upper source point, NaN where dst is outside src
+    """
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    n = (~np.isnan(src)).sum(axis=-1, keepdims=True)  # valid points of each grid
+    if (n < 2).any():
+        raise ValueError("source grid needs at least 2 points")
+
+    if src.ndim == 1:
+        i = np.searchsorted(src, dst, "right") - 1
+    else:  # NaN padding compares False, so is never counted
+        i = (src[..., None, :] <= dst[:, None]).sum(axis=-1) - 1
+    i = np.clip(i, 0, n - 2)
+
+    z0 = np.take_along_axis(src, i, axis=-1)
+    z1 = np.take_along_axis(src, i + 1, axis=-1)
+    w = (dst - z0) / (z1 - z0)
+    w[(w < 0) | (w > 1)] = np.nan
+
+    return i, w
+
+
+class AltInterp:
+    """
+    linear interpolation from src to dst altitude grid, computed once and applied to
+    any number of arrays sharing src, with altitude on axis -2 and columns (parameters) on axis -1.
+    """
+
+    def __init__(self, src: np.ndarray, dst: np.ndarray, fill: float = np.nan):
+        self.dst = np.asarray(dst, dtype=float)
+        self.index, self.weight = interpweights(src, dst)
+        self.fill = fill
+
+    def __call__(self, y: np.ndarray, dtype=None) -> np.ndarray:
+        """
+        y: (..., n, k) values on src grid, leading dimensions matching stacked src grids
+        dtype: precision of arithmetic and output, default float64
+
+        returns (..., m, k) values on dst grid
+        """
+        y = np.asarray(y)
+        i = self.index[..., None]
+        w = self.weight[..., None].astype(dtype or np.float64, copy=False)
+        y = y.astype(np.result_type(y.dtype, w.dtype) if dtype is None else dtype, copy=False)
+
+        out = np.take_along_axis(y, i, axis=-2) * (1 - w) + np.take_along_axis(y, i + 1, axis=-2) * w
+        if not np.isnan(self.fill):
+            out[np.broadcast_to(np.isnan(w), out.shape)] = self.fill
+
+        return out
@@ -3,6 +3,8 @@ from typing import Dict, Any, Tuple
 from datetime import datetime, timedelta
 import numpy as np
 
+from .trace import span
+
 
 def parseionoheader(h: np.ndarray) -> Dict[str, Any]:
     """
@@ -34,36 +36,79 @@ def parseionoheader(h: np.ndarray) -> Dict[str, Any]:
     # ... and so on with asserts. Just checking we aren't reading the totally wrong type of file
     # not a Series because all have to be same datatype
     # not a Dataframe because it's only 1-D
-    hd = {
-        "nx": h[0].astype(int),
-        "ncol": h[1].astype(int),
-        "intpas": h[8],
-        "longeo": h[9],
-        "latgeo": h[10],
-        "lonmag": h[11],
-        "latmag": h[12],
-        "tmag": h[13],
-        "f1072": h[14],
-        "f1073": h[15],
-        "ap2": h[16],
-        "ikp": h[17],
-        "dTinf": h[18],
-        "dUinf": h[19],
-        "cofo": h[20],
-        "cofh": h[21],
-        "cofn": h[22],
-        "chi": h[23],
-        "approx": h[36],
-    }
+    hd = {k: h[i] for k, i in HEADFIELDS.items()}
+    hd["nx"] = hd["nx"].astype(int)
+    hd["ncol"] = hd["ncol"].astype(int)
 
     # h[37] last non-zero value till h[59], then zeros till start of data at byte 504
     # h[59] has value of 1.0
 
-    hd["htime"] = datetime(year=h[2], month=h[3], day=h[4], hour=h[5], minute=h[6], second=h[7])
+    hd["htime"] = headtimes(h)[0].astype(datetime)
 
     return hd
 
 
+# header value index of each parseionoheader field
+HEADFIELDS = {
+    "nx": 0,
+    "ncol": 1,
+    "intpas": 8,
+    "longeo": 9,
+    "latgeo": 10,
+    "lonmag": 11,
+    "latmag": 12,
+    "tmag": 13,
+    "f1072": 14,
+    "f1073": 15,
+    "ap2": 16,
+    "ikp": 17,
+    "dTinf": 18,
+    "dUinf": 19,
+    "cofo": 20,
+    "cofh": 21,
+    "cofn": 22,
+    "chi": 23,
+    "approx": 36,
+}
+
+
+def parseionoheaders(h: np.ndarray) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    vectorized parseionoheader over a 2-D (n_records, nhead) header array
+
+    Returns
+    -------
+
+    hd: dict of numpy.ndarray
+        one array per parseionoheader field, "htime" is datetime64[s] (NaT for bad records)
+    bad: numpy.ndarray
+        indices of records failing the parseionoheader sanity checks
+    """
+    h = np.atleast_2d(h)
+
+    ok = (
+        (1 <= h[:, 3])
+        & (h[:, 3] <= 12)
+        & (1 <= h[:, 4])
+        & (h[:, 4] <= 31)
+        & (0 <= h[:, 5])
+        & (h[:, 5] < 24)
+        & (0 <= h[:, 6])
+        & (h[:, 6] < 60)
+        & (0 <= h[:, 7])
+        & (h[:, 7] < 60)
+    )
+
+    hd = {k: h[:, i] for k, i in HEADFIELDS.items()}
+    hd["nx"] = hd["nx"].astype(int)
+    hd["ncol"] = hd["ncol"].astype(int)
+
+    hd["htime"] = np.full(h.shape[0], np.datetime64("NaT"), "datetime64[s]")
+    hd["htime"][ok] = headtimes(h[ok])
+
+    return hd, np.flatnonzero(~ok)
+
+
 def readionoheader(tcofn: Path, nhead: int) -> Tuple[Dict[str, Any], np.ndarray]:
     """ reads BINARY transcar_output file """
     tcofn = Path(tcofn).expanduser()  # not dupe, for those importing externally
@@ -77,6 +122,142 @@ def readionoheader(tcofn: Path, nhead: int) -> Tuple[Dict[str, Any], np.ndarray]
     return parseionoheader(h), h
 
 
+def headtimes(h: np.ndarray) -> np.ndarray:
+    """
+    vectorized equivalent of parseionoheader "htime" over a 2-D (n_records, nhead) header array
+
+    Returns
+    -------
+
+    t: numpy.ndarray
+        datetime64[s] time of each record
+    """
+    ymdhms = np.atleast_2d(h)[:, 2:8].astype(int)
+
+    t = (ymdhms[:, 0] - 1970).astype("datetime64[Y]") + (ymdhms[:, 1] - 1).astype("timedelta64[M]")
+    t = t.astype("datetime64[D]") + (ymdhms[:, 2] - 1).astype("timedelta64[D]")
+
+    return t + (3600 * ymdhms[:, 3] + 60 * ymdhms[:, 4] + ymdhms[:, 5]).astype("timedelta64[s]")
+
+
+def reademissions(
+    kinfn: Path, size_record: int, nline: int, out: np.ndarray = None, blocksize: int = 2 ** 22, dtype=None
+) -> np.ndarray:
+    """
+    parse the numbers of ASCII dir.output/emissions.dat straight into a float64 (or dtype) buffer,
+    a block of whole lines at a time, without making a Python object per number.
+
+    Parameters
+    ----------
+
+    kinfn: pathlib.Path
+        emissions.dat filename
+    size_record: int
+        number of values per time step, including header
+    nline: int
+        number of lines per time step, including header
+    out: numpy.ndarray, optional
+        preallocated buffer of at least n_t * size_record elements
+    blocksize: int
+        bytes read per block
+    dtype: optional
+        precision of allocated buffer, default float64
+
+    Returns
+    -------
+
+    dstream: numpy.ndarray
+        1-D n_t * size_record values of the complete time steps in the file
+    """
+    kinfn = Path(kinfn).expanduser()
+    with span("reademissions") as s:
+        # %% count complete time steps, to allocate exactly once
+        nlines = 0
+        last = b"\n"
+        with kinfn.open("rb") as f:
+            for block in iter(lambda: f.read(blocksize), b""):
+                nlines += block.count(b"\n")
+                s.add(nbytes=len(block))
+                last = block[-1:]
+        if last != b"\n":  # unterminated last line
+            nlines += 1
+
+        n = nlines // nline * size_record
+        if out is None:
+            out = np.empty(n, dtype or np.float64)
+        elif out.size < n:
+            raise ValueError(f"out has {out.size} elements, need {n}")
+        dstream = out.ravel()[:n]
+        # %% parse
+        i = 0
+        tail = b""
+        with kinfn.open("rb") as f:
+            while i < n:
+                block = f.read(blocksize)
+                s.add(nbytes=len(block))
+                if block:
+                    block = tail + block
+                    cut = block.rfind(b"\n") + 1
+                    tail = block[cut:]
+                    block = block[:cut]
+                else:  # EOF, unterminated last line
+                    block, tail = tail, b""
+                    if not block:
+                        break
+
+                v = np.fromstring(block, sep=" ")
+                m = min(v.size, n - i)
+                dstream[i: i + m] = v[:m]
+                i += m
+
+        if i != n:
+            raise ValueError(f"{kinfn}: parsed {i} values, expected {n}")
+        s.add(records=n // size_record)
+
+    return dstream
+
+
+def emissions_offsets(kinfn: Path, nline: int, blocksize: int = 2 ** 22) -> np.ndarray:
+    """
+    byte offsets of the time steps of ASCII dir.output/emissions.dat, found by counting lines
+    without parsing numbers.
+
+    Parameters
+    ----------
+
+    kinfn: pathlib.Path
+        emissions.dat filename
+    nline: int
+        number of lines per time step, including header
+
+    Returns
+    -------
+
+    offsets: numpy.ndarray
+        n_t + 1 offsets: time step i is bytes offsets[i] to offsets[i+1]
+    """
+    kinfn = Path(kinfn).expanduser()
+
+    ends = [np.zeros(1, np.int64)]
+    nlines = 0
+    pos = 0
+    last = b"\n"
+    with kinfn.open("rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            newline = np.flatnonzero(np.frombuffer(block, np.uint8) == ord("\n"))
+            # newlines ending a time step
+            k = np.arange(nlines + 1, nlines + newline.size + 1)
+            ends.append(pos + newline[k % nline == 0] + 1)
+            nlines += newline.size
+            pos += len(block)
+            last = block[-1:]
+
+    if last != b"\n" and (nlines + 1) % nline == 0:  # unterminated last line completes a time step
+        ends.append(np.array([pos], np.int64))
+
+    return np.concatenate(ends)
+
+
 def readTranscarInput(infn: Path) -> Dict[str, Any]:
     """
     The transcar input file is indexed by line number --this is what the Fortran
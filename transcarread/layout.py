@@ -0,0 +1,138 @@
+"""
+column layouts of Transcar data records: which of the ncol columns hold each parameter.
+
+Layouts are data in LAYOUTS, keyed by (file kind, minimum approx, minimum ncol).
+A file uses the entry of its kind with the largest minimum approx, then ncol, not above its own.
+Supporting another Transcar version is adding an entry.
+
+Each layout is compiled once into a read-only index array, so readers select columns of
+any number of records with a single np.take.
+"""
+from functools import lru_cache
+from typing import NamedTuple, Tuple, Dict
+import numpy as np
+
+# transcar_output parameters
+PARAM = [
+    "n1",
+    "n2",
+    "n3",
+    "n4",
+    "n5",
+    "n6",
+    "n7",
+    "v1",
+    "v2",
+    "v3",
+    "vm",
+    "ve",
+    "t1p",
+    "t1t",
+    "t2p",
+    "t2t",
+    "t3p",
+    "t3t",
+    "tmp",
+    "tmt",
+    "tep",
+    "tet",
+]
+# initial conditions .dat parameters
+INITPARAM = [
+    "n1",
+    "n2",
+    "n3",
+    "n4",
+    "n5",
+    "n6",
+    "v1",
+    "v2",
+    "v3",
+    "vm",
+    "ve",
+    "t1p",
+    "t1t",
+    "t2p",
+    "t2t",
+    "t3p",
+    "t3t",
+    "tmp",
+    "tmt",
+    "tep",
+    "tet",
+    "q1",
+    "q2",
+    "q3",
+    "qe",
+    "nno",
+    "uno",
+    "po",
+    "ph",
+    "pn",
+    "pn2",
+    "po2",
+    "heat",
+    "po1d",
+    "no1d",
+    "uo1d",
+    "n7",
+]
+
+# before approx 13, temperatures are isotropic: parallel and transverse share a column
+_ISOTEMP = (12, 13, 13, 14, 14, 15, 15, 16, 16)
+
+# (kind, minimum approx, minimum ncol): (columns, names), from transconvec_13.op.f lines 452 - 542
+LAYOUTS: Dict[Tuple[str, int, int], Tuple[tuple, list]] = {
+    ("tra", 0, 50): ((*range(1, 7), 49, *range(7, 13), *_ISOTEMP), PARAM),
+    ("tra", 13, 50): ((*range(1, 7), 49, *range(7, 22)), PARAM),
+    ("initcond", 0, 50): ((*range(1, 13), *_ISOTEMP, *range(17, 29), 49), INITPARAM[:33] + ["n7"]),
+    ("initcond", 0, 61): ((*range(1, 13), *_ISOTEMP, *range(17, 29), 60, 61, 62, 49), INITPARAM),
+    ("initcond", 13, 50): ((*range(1, 34), 49), INITPARAM[:33] + ["n7"]),
+    ("initcond", 13, 61): ((*range(1, 34), 60, 61, 62, 49), INITPARAM),
+}
+
+
+class Layout(NamedTuple):
+    columns: np.ndarray
+    names: Tuple[str, ...]
+
+    def take(self, data: np.ndarray) -> np.ndarray:
+        """parameter columns of data (..., ncol)"""
+        return np.take(data, self.columns, axis=-1)
+
+
+def layout(kind: str, approx: float, ncol: int) -> Layout:
+    """
+    Parameters
+    ----------
+
+    kind: str
+        "tra" transcar_output or "initcond" initial conditions .dat
+    approx: float
+        approximation of the simulation, from header
+    ncol: int
+        number of columns of the file, from header
+
+    Returns
+    -------
+
+    layout: Layout
+        read-only index array of columns and the parameter name of each
+    """
+    return _compile(kind, int(approx), int(ncol))
+
+
+@lru_cache(maxsize=None)
+def _compile(kind: str, approx: int, ncol: int) -> Layout:
+    keys = [k for k in LAYOUTS if k[0] == kind and k[1] <= approx and k[2] <= ncol]
+    if not keys:
+        raise ValueError(f"no column layout for {kind} approx {approx} ncol {ncol}")
+
+    cols, names = LAYOUTS[max(keys)]
+    if len(cols) != len(names):
+        raise ValueError(f"layout {max(keys)} has {len(cols)} columns for {len(names)} names")
+
+    columns = np.array(cols, dtype=np.intp)
+    columns.setflags(write=False)
+
+    return Layout(columns, tuple(names))
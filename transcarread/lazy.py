@@ -0,0 +1,26 @@
+"""
+deferred import of heavy dependencies (xarray, matplotlib), so that "import transcarread"
+stays fast for processes that only read inputs or headers.
+
+    xarray = lazymodule("xarray")
+
+imports xarray on first attribute access, e.g. xarray.Dataset.
+Modules using this have "from __future__ import annotations" so annotations don't trigger the import.
+"""
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    def __getattr__(self, attr: str):
+        # only called for attributes not set on self, so after import every access goes to the module
+        mod = importlib.import_module(self.__name__)
+        return getattr(mod, attr)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazymodule(name: str) -> types.ModuleType:
+    """module "name", imported on first attribute access"""
+    return LazyModule(name)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+watch many running Transcar simulations at once with asyncio, e.g. the 50-100 beams of an event.
+
+Each run is followed (see follow.py) by one task that stats its files every interval,
+and only when a file grew, decodes the new records in a thread pool bounded to "workers" threads.
+New records are delivered to the run's queue, which holds at most "maxsize" updates:
+while a consumer falls behind, its run is not polled and other runs go on.
+Followers keep no history (keep=False), so memory is bounded by the queued updates.
+
+    async with Monitor(Path("event").glob("beam*")) as mon:
+        while True:
+            u = await mon.queues[run].get()  # or: async for u in mon
+            u.data ...
+
+    transcarread-monitor event/beam*
+"""
+from pathlib import Path
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, AsyncIterator
+import asyncio
+import logging
+import xarray
+
+from .follow import Follower, TraFollower, EmissionsFollower
+
+
+class Update(NamedTuple):
+    run: Path
+    kind: str  # "tra" transcar_output or "emissions" emissions.dat
+    data: Optional[xarray.Dataset]  # new records, None with error
+    error: Optional[Exception] = None  # decoding failed, the file is no longer followed
+
+
+FOLLOWERS = {"tra": TraFollower, "emissions": EmissionsFollower}
+
+
+class Monitor:
+    """
+    Parameters
+    ----------
+
+    paths: iterable of pathlib.Path
+        paths above dir.output/ of each run
+    interval: float
+        seconds between checks of each run's files for growth
+    workers: int
+        number of threads decoding at once
+    maxsize: int
+        number of updates each run's queue holds before its polling waits for the consumer
+    kinds: list of str
+        files to follow, keys of FOLLOWERS
+    dtype: optional
+        precision of decoded data, see read_tra
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        interval: float = 1.0,
+        workers: int = 4,
+        maxsize: int = 4,
+        kinds: Iterable[str] = ("tra",),
+        dtype=None,
+    ):
+        if interval <= 0:
+            raise ValueError("interval must be > 0")
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1, an unbounded queue gives no backpressure")
+        self.kinds = list(kinds)
+        bad = set(self.kinds) - set(FOLLOWERS)
+        if bad:
+            raise ValueError(f"unknown kinds {bad}, must be of {list(FOLLOWERS)}")
+
+        self.interval = interval
+        self.workers = workers
+        self.maxsize = maxsize
+        self.dtype = dtype
+        self.followers: Dict[Path, List[Follower]] = {}
+        self.queues: Dict[Path, asyncio.Queue] = {}
+        self._paths = [Path(p).expanduser() for p in paths]
+        self._tasks: Dict[Path, asyncio.Task] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._ready: Optional[asyncio.Event] = None  # set when an update is queued or a run's task ends
+
+    async def __aenter__(self) -> "Monitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def start(self):
+        """start following the runs, from within the event loop"""
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="transcarread-monitor")
+        self._ready = asyncio.Event()
+        for p in self._paths:
+            self.add(p)
+
+    def add(self, path: Path) -> asyncio.Queue:
+        """start following another run, e.g. one started after the monitor"""
+        if self._executor is None:
+            raise RuntimeError("monitor not started")
+
+        path = Path(path).expanduser()
+        if path not in self._tasks:
+            self.followers[path] = [FOLLOWERS[k](path, self.dtype, keep=False) for k in self.kinds]
+            self.queues[path] = asyncio.Queue(self.maxsize)
+            self._tasks[path] = asyncio.ensure_future(self._follow(path))
+
+        return self.queues[path]
+
+    async def stop(self):
+        """stop polling, leaving undelivered updates in the queues"""
+        tasks = list(self._tasks.values())
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._executor is not None:
+            pool, self._executor = self._executor, None
+            # decodes running when their task was cancelled finish in the pool, waited for off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    async def __aiter__(self) -> AsyncIterator[Update]:
+        """
+        updates of all runs as they are queued, one per run in turn across runs with pending updates.
+        Ends when every run's task has ended (stop(), or all its files failed) and the queues are drained.
+        """
+        if self._ready is None:
+            raise RuntimeError("monitor not started")
+
+        while True:
+            pending = [q for q in self.queues.values() if not q.empty()]
+            if not pending:
+                if not self._tasks:
+                    return
+                self._ready.clear()  # no await since the checks above, so no update is missed
+                await self._ready.wait()
+                continue
+            for q in pending:
+                if not q.empty():  # the consumer may have taken it during the yield
+                    yield q.get_nowait()
+
+    async def _follow(self, path: Path):
+        loop = asyncio.get_running_loop()
+        queue = self.queues[path]
+        followers = dict(zip(self.kinds, self.followers[path]))
+
+        async def put(u: Update):
+            await queue.put(u)  # waits while the consumer is behind
+            self._ready.set()
+
+        try:
+            while followers:
+                for kind, f in list(followers.items()):
+                    if not f.changed():  # one stat call, no thread hop while idle
+                        continue
+                    try:
+                        new = await loop.run_in_executor(self._executor, f.poll)
+                    except Exception as e:
+                        logging.error(f"{f.fn}: {e}, no longer followed")
+                        del followers[kind]
+                        await put(Update(path, kind, None, e))
+                        continue
+                    if new is not None:
+                        await put(Update(path, kind, new))
+
+                if followers:
+                    await asyncio.sleep(self.interval)
+        finally:
+            if self._tasks.get(path) is asyncio.current_task():
+                del self._tasks[path]
+            self._ready.set()
+
+
+async def _print(mon: Monitor):
+    async for u in mon:
+        if u.error is not None:
+            print(f"{u.run} {u.kind}: {u.error}")
+        elif u.kind == "tra":
+            ne = u.data.pp.loc[..., "ne"].max("alt_km").values
+            print(f"{u.run} {u.data.time.values[-1]}  {u.data.time.size} records  max ne {ne.max():.3e}")
+        else:
+            print(f"{u.run} {u.data.time.values[-1]}  {u.data.time.size} emissions time steps")
+
+
+def main():
+    p = ArgumentParser(description="print progress of running Transcar simulations as records are written")
+    p.add_argument("paths", help="paths above dir.output/ e.g. event/beam*", nargs="+")
+    p.add_argument("-i", "--interval", help="seconds between checks for new records", type=float, default=1.0)
+    p.add_argument("-j", "--workers", help="number of decoding threads", type=int, default=4)
+    p.add_argument("-k", "--kinds", help="files to follow", choices=list(FOLLOWERS), nargs="+", default=["tra"])
+    p = p.parse_args()
+
+    async def run():
+        async with Monitor(p.paths, p.interval, p.workers, kinds=p.kinds) as mon:
+            await _print(mon)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
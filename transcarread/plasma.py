@@ -0,0 +1,117 @@
+"""
+ISR plasma parameters ne, vi, Ti, Te computed with plain NumPy over whole blocks,
+e.g. (time, alt_km, isrparam), using integer column indices resolved once per layout.
+
+Refs: transconvec_13.op.f  read_fluidmod.m, data_tra.m
+"""
+from functools import lru_cache
+from typing import NamedTuple, Sequence
+import numpy as np
+
+ISRPARAM = ["ne", "vi", "Ti", "Te"]
+
+
+class ParamIndex(NamedTuple):
+    ne: np.ndarray  # n1..n7
+    nm: np.ndarray  # molecular ions n4, n5, n6
+    n: np.ndarray  # n1, n2, n3
+    v: np.ndarray  # v1, v2, v3
+    tpar: np.ndarray  # t1p, t2p, t3p
+    tperp: np.ndarray  # t1t, t2t, t3t
+    vm: int
+    tmp: int
+    tmt: int
+    tep: int
+    tet: int
+
+
+@lru_cache()
+def paramindex(names: Sequence[str]) -> ParamIndex:
+    """
+    integer column indices of the parameters needed for ISR parameters
+
+    Parameters
+    ----------
+
+    names: tuple of str
+        parameter name of each column, e.g. transcarread.PARAM
+    """
+    col = {n: i for i, n in enumerate(names)}
+
+    def ind(*keys: str) -> np.ndarray:
+        return np.array([col[k] for k in keys])
+
+    return ParamIndex(
+        ne=ind("n1", "n2", "n3", "n4", "n5", "n6", "n7"),
+        nm=ind("n4", "n5", "n6"),
+        n=ind("n1", "n2", "n3"),
+        v=ind("v1", "v2", "v3"),
+        tpar=ind("t1p", "t2p", "t3p"),
+        tperp=ind("t1t", "t2t", "t3t"),
+        vm=col["vm"],
+        tmp=col["tmp"],
+        tmt=col["tmt"],
+        tep=col["tep"],
+        tet=col["tet"],
+    )
+
+
+def plasmaparam(d: np.ndarray, names: Sequence[str], approx: int, out: np.ndarray = None, dtype=None) -> np.ndarray:
+    """
+    compute ne, vi, Ti, Te for every leading index of d at once
+
+    Parameters
+    ----------
+
+    d: numpy.ndarray
+        (..., isrparam) ionosphere state, e.g. (time, alt_km, isrparam)
+    names: sequence of str
+        parameter name of each column of d
+    approx: int
+        Transcar "approx" from header, selects electron temperature formula
+    out: numpy.ndarray, optional
+        preallocated (..., 4) output buffer
+    dtype: optional
+        output and arithmetic precision, default float64 (or out.dtype)
+
+    Returns
+    -------
+
+    pp: numpy.ndarray
+        (..., 4) ne, vi, Ti, Te
+    """
+    c = paramindex(tuple(names))
+
+    if dtype is None:
+        dtype = np.float64 if out is None else out.dtype
+    if out is None:
+        out = np.empty(d.shape[:-1] + (4,), dtype)
+    elif out.shape != d.shape[:-1] + (4,):
+        raise ValueError(f"out shape {out.shape} != {d.shape[:-1] + (4,)}")
+
+    d = np.asarray(d).astype(dtype, copy=False)
+
+    ne, vi, Ti, Te = (out[..., i] for i in range(4))
+
+    np.sum(d[..., c.ne], axis=-1, out=ne)
+    nm = d[..., c.nm].sum(axis=-1)
+    n = d[..., c.n]
+    # %% ion velocity
+    np.einsum("...k,...k->...", n, d[..., c.v], out=vi)
+    vi += nm * d[..., c.vm]
+    vi /= ne
+    # %% ion temperature (n1*t1 + n2*t2 + n3*t3 +nm*tm)/(n1 +n2 +n3 +nm)
+    np.einsum("...k,...k->...", n, d[..., c.tpar], out=Ti)
+    Ti += nm * d[..., c.tmp]
+    Tiperp = np.einsum("...k,...k->...", n, d[..., c.tperp])
+    Tiperp += nm * d[..., c.tmt]
+    Ti += 2 * Tiperp
+    Ti /= 3 * ne
+    # %% electron temperature
+    if int(approx) == 13:
+        np.add(d[..., c.tep], 2 * d[..., c.tet], out=Te)
+        Te /= 3.0
+    else:
+        Te[...] = d[..., c.tep]
+
+    return out
@@ -1,12 +1,20 @@
+from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
-import xarray
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, List, TYPE_CHECKING
+import os
 import numpy as np
-from matplotlib.pyplot import figure
-from matplotlib.dates import MinuteLocator, SecondLocator
-from matplotlib.colors import LogNorm
 
 from . import ISRPARAM
+from .lazy import lazymodule
+
+if TYPE_CHECKING:
+    import xarray
+# matplotlib is imported on first plot
+pyplot = lazymodule("matplotlib.pyplot")
+mdates = lazymodule("matplotlib.dates")
+colors = lazymodule("matplotlib.colors")
 
 sfmt = None
 
@@ -14,11 +22,11 @@ sfmt = None
 def timelbl(time, ax, tctime):
     """improve time axis labeling"""
     if time.size < 200:
-        ax.xaxis.set_minor_locator(SecondLocator(interval=10))
-        ax.xaxis.set_minor_locator(SecondLocator(interval=2))
+        ax.xaxis.set_minor_locator(mdates.SecondLocator(interval=10))
+        ax.xaxis.set_minor_locator(mdates.SecondLocator(interval=2))
     elif time.size < 500:
-        ax.xaxis.set_minor_locator(MinuteLocator(interval=10))
-        ax.xaxis.set_minor_locator(MinuteLocator(interval=2))
+        ax.xaxis.set_minor_locator(mdates.MinuteLocator(interval=10))
+        ax.xaxis.set_minor_locator(mdates.MinuteLocator(interval=2))
 
     # ax.axvline(tTC[tReqInd], color='white', linestyle='--',label='Req. Time')
     if (tctime["tstartPrecip"] >= time[0]) & (tctime["tstartPrecip"] <= time[-1]):
@@ -27,8 +35,14 @@ def timelbl(time, ax, tctime):
         ax.axvline(tctime["tendPrecip"], color="red", linestyle="--", label="Precip. End")
 
 
-def plot_isr(iono: xarray.Dataset, infile: Path, tctime: dict, plot_params: list, verbose: bool = False):
-    """Plot Transcar ISR parameters"""
+def plot_isr(
+    iono: xarray.Dataset, infile: Path, tctime: dict, plot_params: list, verbose: bool = False, width: int = None
+):
+    """
+    Plot Transcar ISR parameters
+
+    width: decimate time axis of time-altitude plots to about this many pixel columns (see decimate)
+    """
     time = iono.time.values.astype("datetime64[us]")
 
     alt = iono.alt_km.values
@@ -41,30 +55,155 @@ def plot_isr(iono: xarray.Dataset, infile: Path, tctime: dict, plot_params: list
 
         _plot1d(dat, alt, p, infile, tctime, time[-1])
 
-        if p == "ne":
-            cn = LogNorm()
-        else:
-            cn = None
-        if p == "vi":
-            vmax = abs(dat).max()
-            vmin = -vmax
-            cmap = "bwr"
-        else:
-            cmap = "cubehelix"
-            vmin = vmax = None
-
         if time.size > 5:
-            fg = figure()
-            ax = fg.gca()
-            pcm = ax.pcolormesh(time, alt, dat.values.T, cmap=cmap, norm=cn, vmin=vmin, vmax=vmax)
-            _tplot(time, tctime, fg, ax, pcm, p, infile)
+            fg = pyplot.figure()
+            _pcolor(fg, *decimate(time, dat.values, width), alt, p, infile, tctime)
     # %% ionosphere state parameters
-    if verbose:
-        for ind in ("n1", "n2", "n3", "n4", "n5", "n6"):
-            fg = figure()
-            ax = fg.gca()
-            pcm = ax.pcolormesh(time, alt, iono[ind].values, cmap=cmap, norm=LogNorm(), vmin=0.1, vmax=1e12)
-            _tplot(time, tctime, fg, ax, pcm, str(ind), infile)
+    if verbose and time.size > 5:
+        for ind in DENSITIES:
+            fg = pyplot.figure()
+            _pcolor(fg, *decimate(time, iono["iono"].loc[..., ind].values, width), alt, ind, infile, tctime)
+
+
+DENSITIES = ("n1", "n2", "n3", "n4", "n5", "n6")
+
+
+def decimate(time: np.ndarray, y: np.ndarray, width: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    reduce time axis 0 of y to 2 * width rows preserving extrema:
+    the minimum and maximum of each of width bins of consecutive times, ignoring NaN.
+    Unchanged if width is None or there are no more than 2 * width times.
+
+    Returns
+    -------
+
+    time: numpy.ndarray
+        bin start time (minimum row) and bin middle time (maximum row)
+    y: numpy.ndarray
+        (2 * width, ...) minimum and maximum of each bin
+    """
+    n = time.size
+    if width is None or n <= 2 * width:
+        return time, y
+
+    edges = np.linspace(0, n, width + 1).astype(int)[:-1]
+    mid = (edges + np.append(edges[1:], n)) // 2
+
+    out = np.empty((2 * width,) + y.shape[1:], np.result_type(y.dtype, np.float32))
+    with np.errstate(invalid="ignore"):
+        out[0::2] = np.fmin.reduceat(y, edges, axis=0)
+        out[1::2] = np.fmax.reduceat(y, edges, axis=0)
+
+    t = np.empty(2 * width, time.dtype)
+    t[0::2] = time[edges]
+    t[1::2] = time[mid]
+
+    return t, out
+
+
+def render_isr(
+    iono: xarray.Dataset,
+    outdir: Path,
+    tctime: dict,
+    plot_params: list = None,
+    verbose: bool = False,
+    width: int = 1000,
+    workers: int = None,
+    fmt: str = "png",
+) -> List[Path]:
+    """
+    render time-altitude plots of plot_isr to files, without a display, one figure per process in a pool.
+    Time is first decimated to width (see decimate), so rendering time doesn't grow with run length.
+
+    Parameters
+    ----------
+
+    iono: xarray.Dataset
+        from read_tra, or read_beams(kind="iono") giving a figure for each beam
+    outdir: pathlib.Path
+        directory to write <beam>_<parameter>.<fmt> to
+    tctime: dict
+        from readTranscarInput
+    plot_params: list of str, optional
+        ISR parameters to plot, default all
+    verbose: bool
+        also plot densities n1..n6
+    width: int
+        figure width [pixels], the time axis is decimated to this
+    workers: int, optional
+        number of processes, default number of CPUs
+    fmt: str
+        image file format
+
+    Returns
+    -------
+
+    fns: list of pathlib.Path
+        files written
+    """
+    outdir = Path(outdir).expanduser()
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    beams = iono.beam_energy_eV.values if "beam_energy_eV" in iono.dims else [None]
+    params = [p for p in ISRPARAM if not plot_params or p in plot_params]
+
+    time = iono.time.values.astype("datetime64[us]")
+    alt = iono.alt_km.values
+    dpi = 100
+    if time.size <= 5:  # as plot_isr
+        return []
+
+    jobs = []
+    for b in beams:
+        ib = iono if b is None else iono.sel(beam_energy_eV=b)
+        name = "" if b is None else f"beam{b:g}_"
+        dats = [(p, ib["pp"].loc[..., p]) for p in params]
+        if verbose:
+            dats += [(p, ib["iono"].loc[..., p]) for p in DENSITIES]
+        for p, dat in dats:
+            t, y = decimate(time, dat.values, width)
+            ofn = outdir / f"{name}{p}.{fmt}"
+            jobs.append((ofn, t, y, alt, p, f"{ib.attrs.get('filename', '')} {name.rstrip('_')}", tctime, (width / dpi, 6), dpi))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return list(map(_render, jobs))
+
+    with ProcessPoolExecutor(workers) as exe:
+        return list(exe.map(_render, jobs))
+
+
+def _render(job: tuple) -> Path:
+    """draw one time-altitude figure to file with the Agg canvas, independent of the pyplot backend"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    ofn, t, y, alt, p, title, tctime, figsize, dpi = job
+
+    fg = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fg)
+    _pcolor(fg, t, y, alt, p, title, tctime)
+    fg.savefig(ofn)
+
+    return ofn
+
+
+def _pcolor(fg, time: np.ndarray, y: np.ndarray, alt: np.ndarray, p: str, infile, tctime: dict):
+    """(time, alt_km) pseudocolor plot of parameter p, in the color scale of p"""
+    cmap = "cubehelix"
+    norm = vmin = vmax = None
+    if p == "ne":
+        norm = colors.LogNorm()
+    elif p == "vi":
+        vmax = float(np.nanmax(abs(y)))
+        vmin = -vmax
+        cmap = "bwr"
+    elif p in DENSITIES:
+        norm = colors.LogNorm(vmin=0.1, vmax=1e12)
+
+    ax = fg.gca()
+    pcm = ax.pcolormesh(time, alt, y.T, cmap=cmap, norm=norm, vmin=vmin, vmax=vmax, shading="auto")
+    _tplot(time, tctime, fg, ax, pcm, p, infile)
 
 
 def _tplot(t, tctime: dict, fg, ax, pcm, ttxt: str, infile: Path):
@@ -86,7 +225,7 @@ def _plot1d(y: np.ndarray, z: np.ndarray, name: str, infile: Path, tctime: dict,
     else:
         raise ValueError(f"this is for 1-D plots, not ndim={y.ndim}")
 
-    ax = figure().gca()
+    ax = pyplot.figure().gca()
     ax.plot(y, z)
     ax.set_xlabel(name)
     ax.set_ylabel("altitude")
@@ -101,8 +240,8 @@ def _plot1d(y: np.ndarray, z: np.ndarray, name: str, infile: Path, tctime: dict,
 def plotionoinit(msis: xarray.DataArray):
     """plot Transcar ionosphere initial condition data"""
 
-    figure(1).clf()
-    ax = figure(1).gca()
+    pyplot.figure(1).clf()
+    ax = pyplot.figure(1).gca()
     for i in [f"n{j}" for j in range(1, 7)]:
         ax.plot(msis.loc[:, i], msis.alt_km, label=i)
 
@@ -113,8 +252,8 @@ def plotionoinit(msis: xarray.DataArray):
     ax.set_xlabel("n [m$^{-3}$]")
     ax.set_title(f'{msis.attrs["filename"]} \n Density components')
     # %% velocities
-    figure(2).clf()
-    ax = figure(2).gca()
+    pyplot.figure(2).clf()
+    ax = pyplot.figure(2).gca()
     for s in ("v1", "v2", "v3", "ve", "vm"):
         ax.plot(msis.loc[:, s], msis.alt_km, label=s)
 
@@ -127,7 +266,7 @@ def plotionoinit(msis: xarray.DataArray):
 
 def plotisrparam(pp: xarray.DataArray, zlim: tuple = None):
     """plot ISR parameter data"""
-    fg = figure(figsize=(12, 5))
+    fg = pyplot.figure(figsize=(12, 5))
     fg.suptitle(pp.attrs["filename"])
 
     ax = fg.subplots(nrows=1, ncols=3, sharey=True)
@@ -166,7 +305,7 @@ def plot_excitation_rates(rates: xarray.DataArray, tReq: datetime = None):
     else:
         return
 
-    ax = figure().gca()
+    ax = pyplot.figure().gca()
     ax.plot(rates, rates.alt_km)
     ax.set_xscale("log")
     ax.set_xlim(left=1e-4)
@@ -178,7 +317,7 @@ def plot_excitation_rates(rates: xarray.DataArray, tReq: datetime = None):
 
 
 def plot_precinput(prec: np.ndarray, name: str):
-    ax = figure().gca()
+    ax = pyplot.figure().gca()
     ax.loglog(prec[:, 0], prec[:, 1], marker="*")
     ax.set_xlabel("energy bin [eV]")
     ax.set_ylabel("differential number flux")
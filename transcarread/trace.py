@@ -0,0 +1,173 @@
+"""
+opt-in instrumentation of reader stages: wall time, bytes read, records decoded and peak allocated memory
+of each named span, delivered to callbacks.
+
+    with transcarread.instrument() as spans:
+        transcarread.read_tra(path)
+    for s in spans:
+        print(s.name, s.wall_s, s.bytes_read, s.records)
+
+or for the whole process, e.g. to feed a metrics system
+
+    transcarread.trace.add_hook(callback)
+
+When no hook is installed, span() returns a shared no-op object, so readers pay one function call per stage.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, List, NamedTuple, Optional, Iterator
+import threading
+import tracemalloc
+
+
+class Span(NamedTuple):
+    name: str
+    parent: str  # enclosing span name, "" at top level
+    wall_s: float
+    bytes_read: int
+    records: int
+    peak_bytes: Optional[int]  # allocated above start of span, None unless memory tracing requested
+
+
+Hook = Callable[[Span], None]
+
+_hooks: List[Hook] = []
+_memory: List[Hook] = []  # hooks that requested memory tracing
+_local = threading.local()
+
+
+class _NoSpan:
+    """stands in for _Span while no hook is installed"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, nbytes: int = 0, records: int = 0):
+        pass
+
+
+NOSPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("name", "parent", "t0", "bytes_read", "records", "mem0", "peak")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bytes_read = 0
+        self.records = 0
+        self.mem0: Optional[int] = None
+        self.peak = 0
+
+    def add(self, nbytes: int = 0, records: int = 0):
+        """count bytes read and records decoded in this span"""
+        self.bytes_read += nbytes
+        self.records += records
+
+    def __enter__(self) -> "_Span":
+        stack = _stack()
+        self.parent = stack[-1].name if stack else ""
+        if tracemalloc.is_tracing():
+            self.mem0, peak = tracemalloc.get_traced_memory()
+            if stack:  # the enclosing span keeps its peak so far, as the peak is reset for this span
+                stack[-1].peak = max(stack[-1].peak, peak)
+            _reset_peak()
+            self.peak = self.mem0
+        stack.append(self)
+        self.t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = perf_counter() - self.t0
+        stack = _stack()
+        stack.pop()
+
+        peak = None
+        if self.mem0 is not None and tracemalloc.is_tracing():
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            peak = self.peak - self.mem0
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+
+        s = Span(self.name, self.parent, wall, self.bytes_read, self.records, peak)
+        for h in list(_hooks):
+            h(s)
+
+        return False
+
+
+def span(name: str):
+    """context manager timing stage "name", with .add(nbytes, records) to count the stage's work"""
+    return _Span(name) if _hooks else NOSPAN
+
+
+def add_hook(hook: Hook, memory: bool = False):
+    """
+    call hook(Span) at the end of every span
+
+    memory: trace allocations (tracemalloc) for peak_bytes. This slows allocation-heavy code while installed.
+    """
+    _hooks.append(hook)
+    if memory:
+        if not _memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _memory.append(_stop)
+        _memory.append(hook)
+
+
+def remove_hook(hook: Hook):
+    _hooks.remove(hook)
+    if hook in _memory:
+        _memory.remove(hook)
+        if _memory == [_stop]:  # last memory hook, stop tracing we started
+            _memory.clear()
+            tracemalloc.stop()
+
+
+@contextmanager
+def instrument(callback: Hook = None, memory: bool = False) -> Iterator[List[Span]]:
+    """
+    collect the spans of reader stages run within the block, in the order they end
+
+    Parameters
+    ----------
+
+    callback: callable, optional
+        also called with each Span as it ends
+    memory: bool
+        measure peak allocated memory of each span, see add_hook
+    """
+    spans: List[Span] = []
+
+    def hook(s: Span):
+        spans.append(s)
+        if callback is not None:
+            callback(s)
+
+    add_hook(hook, memory)
+    try:
+        yield spans
+    finally:
+        remove_hook(hook)
+
+
+def _stop(s: Span):
+    """marks that tracemalloc was started by add_hook"""
+
+
+def _stack() -> List[_Span]:
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def _reset_peak():
+    if hasattr(tracemalloc, "reset_peak"):  # Python >= 3.9
+        tracemalloc.reset_peak()